@@ -0,0 +1,150 @@
+import tarfile
+import zipfile
+import zlib
+from struct import Struct
+from typing import IO, Iterator, Tuple
+
+from .files import lowerext
+from .magic import image_stream_size
+from .tga import tga_exts
+from .types import ImageSizeResult, WindowStream, b2x
+
+archive_exts = ("cbz", "cbr", "tar", "zip")
+
+# https://pkware.cachefly.net/webdocs/casestudies/APPNOTE.TXT
+LOCAL_HEADER = Struct("<4s22xHH")
+LOCAL_SIG = b"PK\x03\x04"
+INFLATE_CHUNK = 4096
+INFLATE_MAX = 65536  # decompressed bytes per step
+INFLATE_WINDOW = 1 << 20
+
+ArchiveResult = Tuple[str, ImageSizeResult]
+
+
+class InflateStream:
+    """Deflated stream which is decompressed only as far as it is read"""
+
+    """  Only last `window` bytes of decompressed data are kept, so skipping
+    through large members takes bounded memory. Reading before the window
+    restarts decompression from the member start."""
+
+    def __init__(self, stream: WindowStream, size: int, window: int = INFLATE_WINDOW):
+        self.stream = stream
+        self.size = size
+        self.window = window
+        self.pos = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self.stream.seek(0)
+        self.data = bytearray()
+        self.start = 0  # member offset of data[0]
+        self.z = zlib.decompressobj(-zlib.MAX_WBITS)
+
+    def seek(self, offs: int, whence: int = 0) -> int:
+        if whence == 1:
+            offs += self.pos
+        elif whence == 2:
+            offs += self.size
+        self.pos = max(offs, 0)
+        return self.pos
+
+    def tell(self) -> int:
+        return self.pos
+
+    def trim(self) -> None:
+        """Drop data before window, but never data at or after pos"""
+        drop = min(len(self.data) - self.window, self.pos - self.start)
+        if drop > 0:
+            del self.data[:drop]
+            self.start += drop
+
+    def inflate(self, end: int) -> None:
+        while self.start + len(self.data) < end and not self.z.eof:
+            chunk = self.z.unconsumed_tail or self.stream.read(INFLATE_CHUNK)
+            if not chunk:
+                break
+            want = min(end - self.start - len(self.data), INFLATE_MAX)
+            self.data += self.z.decompress(chunk, want)
+            self.trim()
+
+    def read(self, size: int = -1) -> bytes:
+        end = self.size if size < 0 else min(self.pos + size, self.size)
+        if self.pos < self.start:
+            self.reset()
+        self.inflate(end)
+        offs = self.pos - self.start
+        data = bytes(self.data[offs : end - self.start])
+        self.pos += len(data)
+        self.trim()
+        return data
+
+
+def is_tga(name: str) -> bool:
+    # TGA is detected by footer, which compressed members have to be
+    # decompressed for, so it is probed only for members named like TGA
+    return lowerext(name) in tga_exts
+
+
+def zip_member_stream(stream: IO[bytes], info: zipfile.ZipInfo) -> Tuple[IO, str]:
+    if info.flag_bits & 1:
+        return None, "Encrypted member"
+
+    stream.seek(info.header_offset)
+    data = stream.read(LOCAL_HEADER.size)
+    if len(data) < LOCAL_HEADER.size:
+        return None, "EOF"
+
+    sig, name_len, extra_len = LOCAL_HEADER.unpack(data)
+    if sig != LOCAL_SIG:
+        return None, f"Wrong local header signature {b2x(sig)}"
+
+    offs = info.header_offset + LOCAL_HEADER.size + name_len + extra_len
+    window = WindowStream(stream, offs, info.compress_size)
+    if info.compress_type == zipfile.ZIP_STORED:
+        return window, None
+    if info.compress_type == zipfile.ZIP_DEFLATED:
+        return InflateStream(window, info.file_size), None
+
+    return None, f"Unsupported compression {info.compress_type}"
+
+
+def zip_image_sizes(stream: IO[bytes]) -> Iterator[ArchiveResult]:
+    """Yields (name, image size result) for every file in ZIP archive"""
+    with zipfile.ZipFile(stream) as z:
+        members = z.infolist()
+
+    for info in members:
+        if info.is_dir():
+            continue
+        s, err = zip_member_stream(stream, info)
+        if err:
+            yield info.filename, (None, err)
+        else:
+            footer = not isinstance(s, InflateStream) or is_tga(info.filename)
+            yield info.filename, image_stream_size(s, footer)
+
+
+def tar_image_sizes(stream: IO[bytes]) -> Iterator[ArchiveResult]:
+    """Yields (name, image size result) for every file in TAR archive"""
+    with tarfile.open(fileobj=stream, mode="r:*") as t:
+        for info in t:
+            if not info.isfile():
+                continue
+            if t.fileobj is stream:
+                # uncompressed archive, read member data in place
+                s = WindowStream(stream, info.offset_data, info.size)
+                footer = True
+            else:
+                s = t.extractfile(info)
+                footer = is_tga(info.name)
+            yield info.name, image_stream_size(s, footer)
+
+
+def archive_image_sizes(stream: IO[bytes]) -> Iterator[ArchiveResult]:
+    """Yields (name, image size result) for every file in ZIP or TAR archive"""
+    if zipfile.is_zipfile(stream):
+        return zip_image_sizes(stream)
+
+    stream.seek(0)
+    return tar_image_sizes(stream)
@@ -0,0 +1,168 @@
+from struct import Struct
+from typing import IO, Optional, Tuple
+
+from .types import PreadStream, b2x
+
+wave_exts = ("wav",)
+flac_exts = ("flac",)
+aiff_exts = ("aif", "aifc", "aiff")
+
+
+class AudioInfo:
+    # plain class rather than dataclass, which is slow to import
+    __slots__ = ("samples", "rate", "channels", "bits", "offset")
+
+    def __init__(
+        self,
+        samples: Optional[int],  # sample frames (per channel), None if unknown
+        rate: int,
+        channels: int,
+        bits: int,
+        offset: int = 0,  # offset of sample data in file, if known
+    ):
+        self.samples = samples
+        self.rate = rate
+        self.channels = channels
+        self.bits = bits
+        self.offset = offset
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={getattr(self, k)!r}" for k in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+AudioInfoResult = Tuple[AudioInfo, str]
+
+# http://soundfile.sapp.org/doc/WaveFormat/
+RIFF = Struct("<4sI4s")
+WAVCHUNK = Struct("<4sI")
+WAVFMT = Struct("<HHIIHH")
+
+# https://xiph.org/flac/format.html#metadata_block_streaminfo
+FLAC = b"fLaC"
+STREAMINFO = 34
+
+# http://paulbourke.net/dataformats/audio/AIFF1.3.pdf
+FORM = Struct(">4sI4s")
+AIFFCHUNK = Struct(">4sI")
+COMM = Struct(">hIh10s")
+
+
+def extended(data: bytes) -> int:
+    """Returns integer part of 80 bit IEEE 754 extended precision number"""
+    exp = int.from_bytes(data[:2], "big") & 0x7FFF
+    mantissa = int.from_bytes(data[2:10], "big")
+    shift = exp - 16383 - 63
+    return mantissa << shift if shift >= 0 else mantissa >> -shift
+
+
+class WaveParser:
+    def __init__(self, stream: IO[bytes]):
+        self.stream = PreadStream(stream)
+
+    def audio_info(self) -> AudioInfoResult:
+        data = self.stream.pread(0, RIFF.size)
+        if len(data) < RIFF.size:
+            return (None, "EOF")
+
+        riff, _, wave = RIFF.unpack(data)
+        if riff != b"RIFF" or wave != b"WAVE":
+            return (None, f"Wrong WAVE signature {b2x(data)}")
+
+        fmt = None
+        offs = RIFF.size
+        while True:
+            data = self.stream.pread(offs, WAVCHUNK.size)
+            if len(data) < WAVCHUNK.size:
+                return (None, "data chunk not found")
+
+            cc, size = WAVCHUNK.unpack(data)
+            if cc == b"fmt ":
+                data = self.stream.read(WAVFMT.size)
+                if len(data) < WAVFMT.size:
+                    return (None, "EOF")
+                fmt = WAVFMT.unpack(data)
+            elif cc == b"data":
+                if not fmt:
+                    return (None, "data chunk before fmt chunk")
+                _, channels, rate, _, align, bits = fmt
+                if not align:
+                    return (None, "Invalid block align 0")
+                info = AudioInfo(size // align, rate, channels, bits)
+                info.offset = offs + WAVCHUNK.size
+                return (info, None)
+
+            # chunks are word aligned
+            offs += WAVCHUNK.size + size + (size & 1)
+
+
+class FlacParser:
+    def __init__(self, stream: IO[bytes]):
+        self.stream = PreadStream(stream)
+
+    def audio_info(self) -> AudioInfoResult:
+        data = self.stream.pread(0, 8 + STREAMINFO)
+        if len(data) < 8 + STREAMINFO:
+            return (None, "EOF")
+
+        if data[:4] != FLAC:
+            return (None, f"Wrong FLAC signature {b2x(data[:4])}")
+
+        if data[4] & 0x7F != 0:
+            return (None, "STREAMINFO is not the first metadata block")
+
+        # 20 bits rate, 3 bits channels-1, 5 bits bps-1, 36 bits total samples
+        bits = int.from_bytes(data[8 + 10 : 8 + 18], "big")
+        rate = bits >> 44
+        channels = ((bits >> 41) & 7) + 1
+        bps = ((bits >> 36) & 31) + 1
+        # total samples 0 means unknown
+        samples = bits & (2**36 - 1) or None
+        return (AudioInfo(samples, rate, channels, bps), None)
+
+
+class AiffParser:
+    def __init__(self, stream: IO[bytes]):
+        self.stream = PreadStream(stream)
+
+    def audio_info(self) -> AudioInfoResult:
+        data = self.stream.pread(0, FORM.size)
+        if len(data) < FORM.size:
+            return (None, "EOF")
+
+        form, _, aiff = FORM.unpack(data)
+        if form != b"FORM" or aiff not in (b"AIFF", b"AIFC"):
+            return (None, f"Wrong AIFF signature {b2x(data)}")
+
+        offs = FORM.size
+        while True:
+            data = self.stream.pread(offs, AIFFCHUNK.size + COMM.size)
+            if len(data) < AIFFCHUNK.size:
+                return (None, "COMM chunk not found")
+
+            cc, size = AIFFCHUNK.unpack(data[: AIFFCHUNK.size])
+            if cc == b"COMM":
+                if len(data) < AIFFCHUNK.size + COMM.size:
+                    return (None, "EOF")
+                comm = COMM.unpack(data[AIFFCHUNK.size :])
+                channels, samples, bits, rate = comm
+                return (AudioInfo(samples, extended(rate), channels, bits), None)
+
+            offs += AIFFCHUNK.size + size + (size & 1)
+
+
+AUDIO_PARSERS = {
+    b"RIFF": WaveParser,
+    FLAC: FlacParser,
+    b"FORM": AiffParser,
+}
+
+
+def audio_info(stream: IO[bytes]) -> AudioInfoResult:
+    """Returns parameters of WAVE, FLAC or AIFF audio stream"""
+    stream.seek(0)
+    sig = stream.read(4)
+    parser = AUDIO_PARSERS.get(sig)
+    if not parser:
+        return (None, f"Unknown audio file {b2x(sig)}")
+    return parser(stream).audio_info()
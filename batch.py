@@ -0,0 +1,226 @@
+from array import array
+from typing import Sequence, Tuple
+
+from .magic import FIRST_BYTE, FORMATS, JXL_SOI, PNG, SIGNATURES
+
+# Format codes returned by classify(): index in CODES, 0 for unknown
+CODES = (None,) + tuple(FORMATS)
+CODE = {name: i for i, name in enumerate(CODES)}
+
+PREFIX_SIZE = 32
+MIN_PREFIX = 12  # same as magic.parse_bytes()
+
+PNG_HEAD = PNG + b"\x00\x00\x00\x0dIHDR"
+GIFS = (b"GIF87a", b"GIF89a")
+VP8_START = b"\x9d\x01\x2a"
+JXL_DIST = (9, 13, 18, 30)
+JXL_RATIO = (None, (1, 1), (12, 10), (4, 3), (3, 2), (16, 9), (5, 4), (2, 1))
+
+# Classification result: format codes, widths and heights, 0 if unknown
+BatchResult = Tuple[Sequence[int], Sequence[int], Sequence[int]]
+
+
+def code_name(code: int) -> str:
+    """Returns magic.FORMATS module name of format code"""
+    return CODES[code]
+
+
+def jxl_size(data: bytes) -> Tuple[int, int]:
+    """Returns width and height of raw JPEG XL codestream SizeHeader"""
+    bits = int.from_bytes(data[2:], "little")
+    div8, bits = bits & 1, bits >> 1
+    sizes = []
+    for _ in range(2):
+        if div8:
+            sizes.append(8 * (1 + (bits & 31)))
+            bits >>= 5
+        else:
+            n = JXL_DIST[bits & 3]
+            sizes.append(1 + ((bits >> 2) & ((1 << n) - 1)))
+            bits >>= 2 + n
+        if len(sizes) == 1:
+            ratio = JXL_RATIO[bits & 7]
+            bits >>= 3
+            if ratio:
+                return (sizes[0] * ratio[0] // ratio[1], sizes[0])
+    return (sizes[1], sizes[0])
+
+
+def prefix_size(name: str, d: bytes) -> Tuple[int, int]:
+    """Returns dimensions from fixed header prefix, (0, 0) if not available"""
+    if name == "png":
+        if len(d) >= 24 and d[:16] == PNG_HEAD:
+            return (int.from_bytes(d[16:20], "big"), int.from_bytes(d[20:24], "big"))
+    elif name == "gif":
+        if d[:6] in GIFS:
+            return (int.from_bytes(d[6:8], "little"), int.from_bytes(d[8:10], "little"))
+    elif name == "bmp":
+        if len(d) >= 26 and d[:2] == b"BM":
+            w = int.from_bytes(d[18:22], "little")
+            return (w, int.from_bytes(d[22:26], "little"))
+        if len(d) >= 26:
+            w = int.from_bytes(d[18:20], "little")
+            return (w, int.from_bytes(d[20:22], "little"))
+    elif name == "webp":
+        if len(d) >= 30 and int.from_bytes(d[4:8], "little") >= 4:
+            if d[12:16] == b"VP8X":
+                w = int.from_bytes(d[24:27], "little") + 1
+                return (w, int.from_bytes(d[27:30], "little") + 1)
+            if d[12:16] == b"VP8 " and d[23:26] == VP8_START:
+                w = int.from_bytes(d[26:28], "little") & 0x3FFF
+                return (w, int.from_bytes(d[28:30], "little") & 0x3FFF)
+    elif name == "jpegxl":
+        if len(d) >= 11 and d[:2] == JXL_SOI:
+            return jxl_size(d)
+    return (0, 0)
+
+
+def classify_prefix(d: bytes) -> Tuple[int, int, int]:
+    """Returns format code, width and height of single prefix"""
+    if len(d) < MIN_PREFIX:
+        return (0, 0, 0)
+    for name, parts in FIRST_BYTE.get(d[0], ()):
+        if all(d.startswith(sig, offs) for offs, sig in parts):
+            return (CODE[name], *prefix_size(name, d))
+    return (0, 0, 0)
+
+
+def classify_python(buf: bytes, width: int = PREFIX_SIZE) -> BatchResult:
+    codes, widths, heights = array("B"), array("L"), array("L")
+    view = memoryview(buf)
+    for i in range(0, len(buf) - width + 1, width):
+        c, w, h = classify_prefix(bytes(view[i : i + width]))
+        codes.append(c)
+        widths.append(w)
+        heights.append(h)
+    return (codes, widths, heights)
+
+
+def classify_numpy(buf: bytes, width: int = PREFIX_SIZE) -> BatchResult:
+    import numpy as np
+
+    a = np.frombuffer(buf, np.uint8, len(buf) // width * width).reshape(-1, width)
+    n = len(a)
+    codes = np.zeros(n, np.uint8)
+    widths = np.zeros(n, np.uint32)
+    heights = np.zeros(n, np.uint32)
+    if width < MIN_PREFIX:
+        return (codes, widths, heights)
+
+    # columns of 1, 2 or 4 bytes viewed as one integer per prefix
+    words = {}
+
+    def word(offs: int, size: int, order: str = "big") -> np.ndarray:
+        key = (offs, size, order)
+        if key not in words:
+            col = np.ascontiguousarray(a[:, offs : offs + size])
+            dtype = f"{'>' if order == 'big' else '<'}u{size}"
+            words[key] = col.view(dtype).ravel()
+        return words[key]
+
+    def match(offs: int, sig: bytes) -> np.ndarray:
+        mask = np.full(n, offs + len(sig) <= width)
+        i = 0
+        while i < len(sig) and mask.any():
+            size = 4 if len(sig) - i >= 4 else 2 if len(sig) - i >= 2 else 1
+            mask &= word(offs + i, size) == int.from_bytes(sig[i : i + size], "big")
+            i += size
+        return mask
+
+    def uint(offs: int, size: int, order: str) -> np.ndarray:
+        if offs + size > width:
+            return np.zeros(n, np.uint64)
+        if size == 3:
+            lo, hi = (offs, offs + 2) if order == "little" else (offs + 1, offs)
+            return uint(lo, 2, "little" if order == "little" else "big") | (
+                word(hi, 1).astype(np.uint64) << np.uint64(16)
+            )
+        return word(offs, size, order).astype(np.uint64)
+
+    for name, parts in SIGNATURES:
+        mask = codes == 0
+        for offs, sig in parts:
+            mask &= match(offs, sig)
+        codes[mask] = CODE[name]
+
+    def put(mask: np.ndarray, w: np.ndarray, h: np.ndarray) -> None:
+        widths[mask] = w[mask]
+        heights[mask] = h[mask]
+
+    png = (codes == CODE["png"]) & match(0, PNG_HEAD)
+    put(png, uint(16, 4, "big"), uint(20, 4, "big"))
+
+    gif = (codes == CODE["gif"]) & (match(0, GIFS[0]) | match(0, GIFS[1]))
+    put(gif, uint(6, 2, "little"), uint(8, 2, "little"))
+
+    bmp = codes == CODE["bmp"]
+    if width >= 26:
+        win = bmp & match(0, b"BM")
+        put(win, uint(18, 4, "little"), uint(22, 4, "little"))
+        put(bmp & ~win, uint(18, 2, "little"), uint(20, 2, "little"))
+
+    webp = (codes == CODE["webp"]) & (uint(4, 4, "little") >= 4)
+    if width >= 30:
+        vp8x = webp & match(12, b"VP8X")
+        put(vp8x, uint(24, 3, "little") + 1, uint(27, 3, "little") + 1)
+        vp8 = webp & match(12, b"VP8 ") & match(23, VP8_START)
+        put(vp8, uint(26, 2, "little") & 0x3FFF, uint(28, 2, "little") & 0x3FFF)
+
+    jxl = (codes == CODE["jpegxl"]) & match(0, JXL_SOI)
+    if width >= 11 and jxl.any():
+        widths[jxl], heights[jxl] = jxl_numpy(a[jxl], width)
+
+    return (codes, widths, heights)
+
+
+def jxl_numpy(a, width: int):
+    """Vectorized jxl_size() of raw codestream rows"""
+    """  SizeHeader takes up to 68 bits, so rows which do not fit into
+    64 bits after SOI are decoded one by one."""
+    import numpy as np
+
+    u64 = np.uint64
+    size = min(8, width - 2)
+    cols = a[:, 2 : 2 + size].astype(u64)
+    bits = (cols << (np.arange(size, dtype=u64) * u64(8))).sum(1, dtype=u64)
+    dist = np.array(JXL_DIST, u64)
+
+    def get(pos, n):
+        return (bits >> pos) & ((u64(1) << n) - u64(1))
+
+    def size_at(pos, div8):
+        k = get(pos, u64(2))
+        n = dist[k.astype(np.intp)]
+        small = u64(8) * (u64(1) + get(pos, u64(5)))
+        large = u64(1) + get(pos + u64(2), n)
+        end = np.where(div8, pos + u64(5), pos + u64(2) + n)
+        return np.where(div8, small, large), end
+
+    div8 = get(u64(0), u64(1)).astype(bool)
+    h, pos = size_at(np.full(len(a), 1, u64), div8)
+    r = get(pos, u64(3)).astype(np.intp)
+    pos = pos + u64(3)
+    num = np.array([1] + [x[0] for x in JXL_RATIO[1:]], u64)[r]
+    den = np.array([1] + [x[1] for x in JXL_RATIO[1:]], u64)[r]
+    w, end = size_at(pos, div8)
+    w = np.where(r > 0, h * num // den, w)
+    end = np.where(r > 0, pos, end)
+
+    # decode rows which need more bits than loaded
+    for i in np.nonzero(end > u64(size * 8))[0]:
+        w[i], h[i] = jxl_size(a[i].tobytes())
+    return w, h
+
+
+def classify(buf: bytes, width: int = PREFIX_SIZE) -> BatchResult:
+    """Classify packed fixed-width header prefixes"""
+    """  Returns format codes (see CODES) and dimensions of formats with
+    fixed headers: PNG, GIF, BMP, WebP VP8/VP8X and raw JPEG XL codestream.
+    Other formats and prefixes which fail header checks get 0 dimensions.
+    TGA has no leading signature and is not recognized.
+    Uses NumPy arrays when numpy is installed, array.array otherwise."""
+    try:
+        import numpy  # noqa: F401
+    except ModuleNotFoundError:
+        return classify_python(buf, width)
+    return classify_numpy(buf, width)
@@ -1,6 +1,7 @@
 from struct import Struct
 from typing import IO
 
+from .magic import BMP_OS2IDS, BMP_WINIDS
 from .types import ImageParser, ImageSize, ImageSizeResult, PreadStream, b2x
 
 bmp_exts = ("bmp", "dib")
@@ -9,8 +10,6 @@ bmp_exts = ("bmp", "dib")
 HEADER = Struct("<2sIHHI")
 OS2HDR = Struct("<IHHHH")
 WINHDR = Struct("<III")
-WINIDS = (b"BM",)
-OS2IDS = (b"BA", b"CI", b"CP", b"IC", b"PT")
 
 
 class BmpParser(ImageParser):
@@ -23,9 +22,9 @@ class BmpParser(ImageParser):
             return (None, "EOF")
 
         sig = HEADER.unpack(data[:14])[0]
-        if sig in WINIDS:
+        if sig in BMP_WINIDS:
             w, h = WINHDR.unpack(data[14:])[1:3]
-        elif sig in OS2IDS:
+        elif sig in BMP_OS2IDS:
             w, h = OS2HDR.unpack(data[14:])[1:3]
         else:
             return (None, f"Unknown BMP type: {b2x(sig)}")
@@ -0,0 +1,43 @@
+import json
+import socket
+from typing import Iterable
+
+# Only stdlib modules are imported, so short-lived processes skip loading
+# parsers and ask running kstools.daemon instead
+
+
+class ImageSizeClient:
+    """Client of kstools.daemon image size server"""
+
+    def __init__(self, path: str, timeout: float = None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+        self.file = self.sock.makefile("rb")
+
+    def __enter__(self) -> "ImageSizeClient":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.file.close()
+        self.sock.close()
+
+    def sizes(self, paths: Iterable[str]) -> list[dict]:
+        """Returns results of paths in one request"""
+        """  Every result has "path" and either "error" or "type", "width",
+        "height" and other fields of the image size class."""
+        request = json.dumps({"paths": list(paths)}).encode("utf-8") + b"\n"
+        self.sock.sendall(request)
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("Server closed connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response["results"]
+
+    def size(self, path: str) -> dict:
+        return self.sizes((path,))[0]
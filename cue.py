@@ -1,7 +1,11 @@
 import logging
 import sys
+from codecs import BOM_UTF8
+from io import BytesIO, StringIO, TextIOWrapper
+from itertools import zip_longest
 from pathlib import Path
-from typing import Callable, NoReturn, Optional, Tuple
+from sys import intern
+from typing import IO, Callable, Iterator, NamedTuple, NoReturn, Optional, Tuple
 
 # Valid CUE file encodings
 VALID_ENCODINGS = {
@@ -51,13 +55,24 @@ Y = yellow
 G = green
 
 
-def detect_encoding(data) -> str:
+# Byte order marks and encodings which decode them
+BOMS = (
+    (b"\xef\xbb\xbf", "UTF-8-SIG"),
+    (b"\xff\xfe", "UTF-16"),
+    (b"\xfe\xff", "UTF-16"),
+)
+
+# Number of bytes passed to chardet
+SAMPLE_SIZE = 16384
+
+
+def guess_encoding(data) -> str:
     try:
         from chardet import detect
 
         trace("using chardet")
 
-        def _detect_encoding(data: bytes) -> str:
+        def _guess_encoding(data: bytes) -> str:
             e = detect(data)["encoding"]
             return ENCODING_MAP.get(e, e)
 
@@ -65,16 +80,38 @@ def detect_encoding(data) -> str:
         warn("chardet module not found, cue file encoding could not be detected.")
         warn('Use "pip install chardet" to enable the feature.')
 
-        def _detect_encoding(data: bytes) -> str:
-            if data.startswith(b"\xef\xbb\xbf"):
-                return "UTF-8-SIG"
-            for i in data:
-                if i > 0x7F:
-                    return "mbcs" if sys.platform.startswith("win") else "utf-8"
-            return "ascii"
+        def _guess_encoding(data: bytes) -> str:
+            return "mbcs" if sys.platform.startswith("win") else "utf-8"
+
+    globals()["guess_encoding"] = _guess_encoding
+    return guess_encoding(data)
+
+
+def detect_encoding(data: bytes, cache: dict = None) -> str:
+    """Returns encoding of data; chardet is used only for non UTF-8 data"""
+    """  cache is optional dict which remembers chardet results by the sample
+    chardet is given, so whole files are not kept alive by the cache"""
+    for bom, e in BOMS:
+        if data.startswith(bom):
+            return e
+
+    if data.isascii():
+        return "ascii"
+
+    try:
+        data.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    sample = data[:SAMPLE_SIZE]
+    if cache is None:
+        return guess_encoding(sample)
 
-    globals()["detect_encoding"] = _detect_encoding
-    return detect_encoding(data)
+    e = cache.get(sample)
+    if e is None:
+        e = cache[sample] = guess_encoding(sample)
+    return e
 
 
 def quote(s: str) -> str:
@@ -102,15 +139,38 @@ def get_string(line: str) -> Tuple[str, str]:
 
 def get_token(line: str) -> Tuple[str, str]:
     """Returns next token and line remainder"""
-    s = line.find(" ")
-    if s < 0:
-        return line, ""
-    else:
-        return line[:s], line[s + 1 :].lstrip()
+    token, _, line = line.partition(" ")
+    return token, line.lstrip()
+
+
+# CD timing
+FRAMES_PER_SECOND = 75
+SAMPLES_PER_FRAME = 588  # 44100 Hz
+AUDIO_FRAME_SIZE = SAMPLES_PER_FRAME * 4  # 16 bit stereo
+
+
+def msf(ts: str) -> int:
+    """Returns number of CD frames in mm:ss:ff timestamp or -1 if invalid"""
+    parts = ts.split(":")
+    if len(parts) != 3 or not all(x.isdigit() for x in parts):
+        return -1
+    m, s, f = (int(x, 10) for x in parts)
+    if s >= 60 or f >= FRAMES_PER_SECOND:
+        return -1
+    return (m * 60 + s) * FRAMES_PER_SECOND + f
+
 
+def fmt_msf(frames: int) -> str:
+    """Returns mm:ss:ff timestamp of given number of CD frames"""
+    s, f = divmod(frames, FRAMES_PER_SECOND)
+    m, s = divmod(s, 60)
+    return f"{m:02d}:{s:02d}:{f:02d}"
 
-def get_ts(line: str) -> Tuple[str, str]:
-    return get_token(line)
+
+def get_ts(line: str) -> Tuple[int, str]:
+    """Returns timestamp in CD frames (-1 if invalid) and line remainder"""
+    ts, line = get_token(line)
+    return msf(ts), line
 
 
 def get_index(line: str) -> Tuple[int, str]:
@@ -123,6 +183,48 @@ def njoin(line: str, next: str) -> str:
     return "\n".join((line, next)) if line else next
 
 
+# Diagnostic codes and their messages
+MESSAGES = {
+    "empty-file": "empty file",
+    "invalid-encoding": "Invalid encoding {}",
+    "unknown-token": "unknown token '{}'",
+    "unused-content": "unused content after {} statement",
+    "outside-track": "{} outside TRACK definition",
+    "unknown-file-type": "unknown FILE type '{}'",
+    "no-track-index": "TRACK has no index",
+    "duplicate-track": "duplicate TRACK index {}",
+    "unknown-track-type": "unknown TRACK type '{}'",
+    "unexpected-track": "unexpected TRACK index {:02d}, expected {:02d}",
+    "invalid-timestamp": "invalid {} timestamp '{}'",
+    "index-order": "INDEX {:02d} is out of order",
+    "rem-not-global": "REM {} must be global",
+}
+
+
+class Diagnostic(NamedTuple):
+    line: int
+    code: str
+    severity: int  # logging level
+    args: tuple
+
+    @property
+    def message(self) -> str:
+        return MESSAGES.get(self.code, "{}").format(*self.args)
+
+    def __str__(self) -> str:
+        return self.message
+
+    def export(self) -> dict:
+        """Returns JSON serializable representation"""
+        return {
+            "line": self.line,
+            "code": self.code,
+            "severity": logging.getLevelName(self.severity).lower(),
+            "args": [a if isinstance(a, (int, str)) else str(a) for a in self.args],
+            "message": self.message,
+        }
+
+
 class CueException(Exception):
     pass
 
@@ -131,57 +233,120 @@ Fn = Callable[[str], str]
 
 
 class Track:
-    performer = None
-    songwriter = None
-    title = None
-    pregap = None
-    postgap = None
-    end = None
-    flags = None
-    isrc = None
+    __slots__ = (
+        "index",
+        "file",
+        "ftype",
+        "ttype",
+        "rem",
+        "indices",
+        "performer",
+        "songwriter",
+        "title",
+        "pregap",
+        "postgap",
+        "end",
+        "flags",
+        "isrc",
+        "split",
+    )
 
     def __init__(self, index: int, ttype: str, file: str, ftype: str):
         self.index = index
         self.file = file
         self.ftype = ftype
         self.ttype = ttype
-        self.rem = []
-        self.indices = []
-
-    def add_rem(self, rem: str, value: str, do_quote: bool = False) -> None:
-        self.rem.append((rem, value, quote if do_quote else nop))
-
-    def njoin_map(self, content: str, ind: str, op: Fn, *names: str) -> str:
+        self.rem = []  # (name, value)
+        self.indices = []  # (number, frames)
+        self.performer = None
+        self.songwriter = None
+        self.title = None
+        self.pregap = None
+        self.postgap = None
+        self.end = None
+        self.flags = None
+        self.isrc = None
+        self.split = 0  # number of INDEX entries which belong to previous FILE
+
+    @property
+    def sector_size(self) -> int:
+        return TRACK_TYPES[self.ttype]
+
+    @property
+    def start(self) -> Optional[int]:
+        """Track start in CD frames (first INDEX in track FILE)"""
+        if len(self.indices) > self.split:
+            return self.indices[self.split][1]
+        return None
+
+    @property
+    def duration(self) -> Optional[int]:
+        """Track length in CD frames, None if track lasts till end of file"""
+        if self.end is None or self.start is None:
+            return None
+        return self.end - self.start
+
+    def index_frames(self, number: int) -> Optional[int]:
+        """Returns INDEX position in CD frames"""
+        for i, frames in self.indices:
+            if i == number:
+                return frames
+        return None
+
+    def frame_range(self) -> Tuple[Optional[int], Optional[int]]:
+        return self.start, self.end
+
+    def sample_range(self) -> Tuple[Optional[int], Optional[int]]:
+        """Track start and end in audio samples"""
+        start, end = self.frame_range()
+        return (
+            None if start is None else start * SAMPLES_PER_FRAME,
+            None if end is None else end * SAMPLES_PER_FRAME,
+        )
+
+    def byte_range(self) -> Tuple[Optional[int], Optional[int]]:
+        """Track start and end offsets in raw file data (audio data or sectors)"""
+        start, end = self.frame_range()
+        size = self.sector_size
+        return (
+            None if start is None else start * size,
+            None if end is None else end * size,
+        )
+
+    def add_rem(self, rem: str, value: str) -> None:
+        self.rem.append((intern(rem), value))
+
+    def tag_lines(self, ind: str, op: Fn, *names: str) -> Iterator[str]:
         for name in names:
             val = getattr(self, name.lower(), None)
-            if not val:
-                continue
-            content = njoin(content, f"{ind}{name} {op(val)}")
-        return content
-
-    def njoin(self, content: str, ind: str, *names: str) -> str:
-        return self.njoin_map(content, ind, nop, *names)
-
-    def njoin_quote(self, content: str, ind: str, *names: str) -> str:
-        return self.njoin_map(content, ind, quote, *names)
-
-    def build(self) -> str:
-        content = ""
-        if self.file:
-            content = njoin(content, f"FILE {quote(self.file)} {self.ftype}")
+            if val:
+                yield f"{ind}{name} {op(val)}"
+
+    def lines(self) -> Iterator[str]:
+        """Yield TRACK definition lines"""
+        file = f"FILE {quote(self.file)} {self.ftype}" if self.file else None
+        if file and not self.split:
+            yield file
         ind = "  "
-        content = njoin(content, f"{ind}TRACK {self.index:02d} {self.ttype}")
+        yield f"{ind}TRACK {self.index:02d} {self.ttype}"
         ind = "    "
-        content = self.njoin_quote(content, ind, "TITLE", "PERFORMER", "SONGWRITER")
-        for rem, value, do_quote in self.rem:
-            if do_quote:
-                value = quote(value)
-            content = njoin(content, f"{ind}REM {rem} {value}")
-        content = self.njoin(content, ind, "FLAGS", "ISRC", "PREGAP")
-        for i in self.indices:
-            content = njoin(content, f"{ind}INDEX {i[0]:02d} {i[1]}")
-        content = self.njoin(content, ind, "POSTGAP")
-        return content
+        yield from self.tag_lines(ind, quote, "TITLE", "PERFORMER", "SONGWRITER")
+        # track REM values have always been written quoted
+        for rem, value in self.rem:
+            yield f"{ind}REM {rem} {quote(value)}"
+        yield from self.tag_lines(ind, nop, "FLAGS", "ISRC")
+        if self.pregap is not None:
+            yield f"{ind}PREGAP {fmt_msf(self.pregap)}"
+        for n, (i, frames) in enumerate(self.indices):
+            # FILE stays between INDEX entries of previous and its own file
+            if file and n == self.split and n:
+                yield file
+            yield f"{ind}INDEX {i:02d} {fmt_msf(frames)}"
+        if self.postgap is not None:
+            yield f"{ind}POSTGAP {fmt_msf(self.postgap)}"
+
+    def build(self) -> str:
+        return "\n".join(self.lines())
 
 
 FILE_TYPES = {
@@ -193,68 +358,92 @@ FILE_TYPES = {
     "WAVE",
 }
 
+# Track types and their sector sizes
 TRACK_TYPES = {
-    "AUDIO",  # Audio/Music (2352 — 588 samples)
-    "CDG",  # Karaoke CD+G (2448)
-    "MODE1/2048",  # CD-ROM Mode 1 Data (cooked)
-    "MODE1/2352",  # CD-ROM Mode 1 Data (raw)
-    "MODE2/2048",  # CD-ROM XA Mode 2 Data (form 1) *
-    "MODE2/2324",  # CD-ROM XA Mode 2 Data (form 2) *
-    "MODE2/2336",  # CD-ROM XA Mode 2 Data (form mix)
-    "MODE2/2352",  # CD-ROM XA Mode 2 Data (raw)
-    "CDI/2336",  # CDI Mode 2 Data
-    "CDI/2352",  # CDI Mode 2 Data
+    "AUDIO": AUDIO_FRAME_SIZE,  # Audio/Music (2352 — 588 samples)
+    "CDG": 2448,  # Karaoke CD+G (2448)
+    "MODE1/2048": 2048,  # CD-ROM Mode 1 Data (cooked)
+    "MODE1/2352": 2352,  # CD-ROM Mode 1 Data (raw)
+    "MODE2/2048": 2048,  # CD-ROM XA Mode 2 Data (form 1) *
+    "MODE2/2324": 2324,  # CD-ROM XA Mode 2 Data (form 2) *
+    "MODE2/2336": 2336,  # CD-ROM XA Mode 2 Data (form mix)
+    "MODE2/2352": 2352,  # CD-ROM XA Mode 2 Data (raw)
+    "CDI/2336": 2336,  # CDI Mode 2 Data
+    "CDI/2352": 2352,  # CDI Mode 2 Data
 }
 
 
 class Cue:
-    valid = True
-    can_fix = False
-    path = None
-    file = None
-    ftype = None
-    nr_files = 0
-    performer = None
-    composer = None
-    genre = None
-    title = None
-    date = None
-    comment = None
-    i = 0
-    errors = 0
-
-    def pre(self) -> str:
-        return f"{Y(self.path)}:{self.i}: "
+    # global values which are also kept as attributes
+    FIELDS = ("performer", "composer", "genre", "title", "date", "comment")
+
+    __slots__ = FIELDS + (
+        "valid",
+        "can_fix",
+        "path",
+        "file",
+        "ftype",
+        "nr_files",
+        "i",
+        "errors",
+        "header",
+        "tracks",
+        "track_indices",
+        "diagnostics",
+    )
+
+    def log(self, level: int, message) -> None:
+        # formatting is skipped entirely if level is disabled
+        if L.isEnabledFor(level):
+            L.log(level, "%s:%d: %s", Y(self.path), self.i, message)
 
     def trace(self, message: str) -> None:
-        trace(self.pre() + message)
+        self.log(logging.DEBUG, message)
 
     def warn(self, message: str) -> None:
-        warn(self.pre() + message)
+        self.log(logging.WARNING, message)
+
+    def report(self, severity: int, code: str, *args) -> Diagnostic:
+        """Record diagnostic for current line; message is formatted lazily"""
+        d = Diagnostic(self.i, code, severity, args)
+        self.diagnostics.append(d)
+        self.log(severity, d)
+        return d
 
-    def err(self, message: str) -> None:
-        self.warn(message)
+    def err(self, code: str, *args) -> None:
+        self.report(logging.ERROR, code, *args)
         self.errors += 1
         self.valid = False
 
-    def throw(self, message) -> NoReturn:
-        raise CueException(self.pre() + message)
+    def throw(self, code: str, *args) -> NoReturn:
+        raise CueException(code, *args)
+
+    def export(self) -> list[dict]:
+        """Returns JSON serializable list of diagnostics"""
+        return [d.export() for d in self.diagnostics]
 
     def current(self) -> Optional[Track]:
         return self.tracks[-1] if self.tracks else None
 
-    def set_end(self, ts) -> None:
+    def set_end(self, frames: int) -> None:
         prev = self.tracks[-2] if len(self.tracks) > 1 else None
-        if prev and not prev.end:
-            prev.end = ts
+        # track which starts new FILE ends previous one at end of its file
+        if prev and prev.end is None and not self.current().file:
+            prev.end = frames
+
+    def get_ts(self, line: str, tag: str) -> Tuple[int, str]:
+        frames, rest = get_ts(line)
+        if frames < 0:
+            self.err("invalid-timestamp", tag, get_token(line)[0])
+        return frames, rest
 
     def check_empty(self, line: str, tag: str) -> None:
         if line:
-            self.err(f"unused content after {tag} statement")
+            self.err("unused-content", tag)
 
     def check_track(self, tag: str) -> None:
         if not self.current():
-            self.throw(f"{tag} outside TRACK definition")
+            self.throw("outside-track", tag)
 
     def parse_tag(self, line: str, tag: str) -> None:
         attr = tag.lower()
@@ -276,13 +465,16 @@ class Cue:
         file, line = get_string(line)
         ftype, line = get_token(line)
         if ftype not in FILE_TYPES:
-            return self.err(f"unknown FILE type '{ftype}'")
-        if self.current() and not self.current().file:
-            self.current().file = file
-            self.current().ftype = ftype
+            return self.err("unknown-file-type", ftype)
+        t = self.current()
+        # FILE between INDEX 00 and INDEX 01 belongs to current track
+        if t and not t.file and t.index_frames(1) is None:
+            t.file = file
+            t.split = len(t.indices)
+            t.ftype = intern(ftype)
         else:
             self.file = file
-            self.ftype = ftype
+            self.ftype = intern(ftype)
         self.nr_files += 1
 
     def parse_TRACK(self, line: str, tag: str) -> None:
@@ -291,36 +483,51 @@ class Cue:
         self.check_empty(line, tag)
 
         if not index:
-            self.throw("TRACK has no index")
-        for t in self.tracks:
-            if t.index == index:
-                self.err(f"duplicate TRACK index {index}")
-                break
+            self.throw("no-track-index")
+        if index in self.track_indices:
+            self.err("duplicate-track", index)
+        self.track_indices.add(index)
         if ttype not in TRACK_TYPES:
-            self.throw(f"unknown TRACK type '{ttype}'")
+            self.throw("unknown-track-type", ttype)
 
-        track = Track(index, ttype, self.file, self.ftype)
+        track = Track(index, intern(ttype), self.file, self.ftype)
         self.tracks.append(track)
         if track.index != len(self.tracks):
-            msg = f"unexpected TRACK index {index:02d}, expected {len(self.tracks):02d}"
-            self.err(msg)
+            self.err("unexpected-track", index, len(self.tracks))
 
         self.file = None
         self.ftype = None
 
     def parse_INDEX(self, line: str, tag: str) -> None:
         index, line = get_index(line)
-        ts, line = get_ts(line)
+        frames, line = self.get_ts(line, tag)
+        if frames < 0:
+            return
         self.check_empty(line, tag)
         self.check_track(tag)
-        self.current().indices.append((index, ts))
-        self.set_end(ts)
+        t = self.current()
+        if t.indices and index <= t.indices[-1][0]:
+            self.err("index-order", index)
+        elif len(t.indices) > t.split and frames <= t.indices[-1][1]:
+            self.err("index-order", index)
+        t.indices.append((index, frames))
+        self.set_end(frames)
 
     def parse_PREGAP(self, line: str, tag: str) -> None:
-        ts, line = get_ts(line)
+        frames, line = self.get_ts(line, tag)
+        if frames < 0:
+            return
+        self.check_empty(line, tag)
+        self.check_track(tag)
+        self.current().pregap = frames
+
+    def parse_POSTGAP(self, line: str, tag: str) -> None:
+        frames, line = self.get_ts(line, tag)
+        if frames < 0:
+            return
         self.check_empty(line, tag)
         self.check_track(tag)
-        self.current().pregap = ts
+        self.current().postgap = frames
 
     def parse_SONGWRITER(self, line: str, tag: str) -> None:
         self.check_track(tag)
@@ -343,7 +550,7 @@ class Cue:
 
     def rem_check_is_global(self, rem: str) -> None:
         if self.current():
-            self.err(f"REM {rem} must be global")
+            self.err("rem-not-global", rem)
 
     def rem_get_string(self, line: str, rem: str) -> Tuple[bool, str]:
         is_quoted = line[0] == '"'
@@ -355,9 +562,9 @@ class Cue:
         attr = rem.lower()
         is_quoted, value = self.rem_get_string(line, rem)
         if self.current():
-            return self.current().add_rem(rem, value, is_quoted)
+            return self.current().add_rem(rem, value)
 
-        if hasattr(self, attr):
+        if attr in Cue.FIELDS:
             setattr(self, attr, value)
         if is_quoted:
             value = quote(value)
@@ -379,23 +586,16 @@ class Cue:
 
     def parse_line(self, i: int, line: str) -> None:
         self.i = i
+        line = line.lstrip(" ")
         if not line:
             return
 
-        ind = 0
-        while line[0] == " ":
-            ind += 1
-            line = line[1:]
-
-        if not line:
-            return
-
-        token, line = get_token(line)
-        parse_token = getattr(self, "parse_" + token, None)
+        token, _, line = line.partition(" ")
+        parse_token = PARSERS.get(token)
         if parse_token:
-            parse_token(line, token)
+            parse_token(self, line.lstrip(), token)
         else:
-            self.err(f"unknown token '{token}'")
+            self.err("unknown-token", token)
 
     def update(self, attr: str, value: str, rem=False, do_quote=False) -> None:
         setattr(self, attr, value)
@@ -414,10 +614,21 @@ class Cue:
     def rem_update(self, attr: str, value: str, do_quote=False) -> None:
         self.update(attr, value, rem=True, do_quote=do_quote)
 
+    def diverges(self, content: str) -> Tuple[bool, Optional[int]]:
+        """Check if content differs from CUE built from parsed parts"""
+        """  Returns (True, index of first different line) or (False, None).
+        Lines are compared like in compare(), but nothing is rendered and
+        comparison stops at the first difference."""
+        lines = zip_longest(content.splitlines(), self.lines(), fillvalue="")
+        for i, (left, right) in enumerate(lines):
+            if left.strip() != right.strip():
+                return True, i
+        return False, None
+
     def compare(self, content: str) -> Tuple[int, str]:
         self.warn(f" errors: {self.errors}")
         content = content.splitlines()
-        build = self.build().splitlines()
+        build = list(self.lines())
 
         n = max(len(content), len(build))
         while len(content) < n:
@@ -425,65 +636,133 @@ class Cue:
         while len(build) < n:
             build.append("")
 
-        out = ""
+        out = []
         any = 0
         for i in range(0, n):
             left = content[i]
             right = build[i]
             line = f"{content[i]:100s} | {build[i]}"
             if left.strip() != right.strip():
-                out = njoin(out, f"{i:02d}:{Y(line)}")
+                out.append(f"{i:02d}:{Y(line)}")
                 any += 1
             else:
-                out = njoin(out, f"{i:02d}:{line}")
-        out = njoin(out, "")
-        return any, out
+                out.append(f"{i:02d}:{line}")
+        out.append("")
+        return any, "\n".join(out)
+
+    def timeline_errors(self) -> list[Tuple[int, str]]:
+        """Check INDEX ordering, overlaps and gaps of all tracks"""
+        """  Returns list of (TRACK number, problem description)"""
+        errors = []
+        prev = None
+        for t in self.tracks:
+            if t.index_frames(1) is None:
+                errors.append((t.index, "no INDEX 01"))
+            if not t.indices:
+                prev = None
+                continue
+            if t.file or not prev:
+                if t.start:
+                    errors.append((t.index, f"gap {fmt_msf(t.start)} at file start"))
+            elif t.start < prev.indices[-1][1]:
+                errors.append((t.index, f"overlaps TRACK {prev.index:02d}"))
+            prev = t
+        return errors
+
+    def lines(self) -> Iterator[str]:
+        """Yield CUE file lines constructed from parsed parts"""
+        if self.header:
+            yield from self.header
+        else:
+            yield ""
+        for track in self.tracks:
+            yield from track.lines()
+
+    def write(self, stream: IO[str]) -> None:
+        """Write CUE file contents to text stream line by line"""
+        lines = self.lines()
+        stream.write(next(lines))
+        for line in lines:
+            stream.write("\n")
+            stream.write(line)
+
+    def write_utf8(self, stream: IO[bytes]) -> None:
+        """Write CUE file contents to binary stream in UTF-8 encoding"""
+        stream.write(BOM_UTF8)
+        text = TextIOWrapper(stream, "UTF-8", newline="", write_through=True)
+        try:
+            self.write(text)
+        finally:
+            text.detach()
 
     def build(self) -> str:
         """Construct CUE file contents from parsed parts"""
-        content = "\n".join(self.header)
-        for track in self.tracks:
-            content = "\n".join((content, track.build()))
-        return content
+        out = StringIO()
+        self.write(out)
+        return out.getvalue()
 
     def utf8(self) -> bytes:
         """Construct CUE file contents from parsed parts in UTF-8 encoding"""
-        return self.build().encode("UTF-8-SIG")
+        out = BytesIO()
+        self.write_utf8(out)
+        return out.getvalue()
 
     def files(self) -> list[str]:
         """List of files referenced by CUE"""
         return [x.file for x in self.tracks if x.file]
 
-    def __init__(self, path: str, data: bytes = None):
+    def __init__(self, path: str, data: bytes = None, encodings: dict = None):
         """Parse CUE file data and return True if no problems found"""
+        """  encodings is optional detect_encoding() cache shared between files"""
         self.path = path
+        self.valid = True
+        self.can_fix = False
+        self.file = None
+        self.ftype = None
+        self.nr_files = 0
+        self.i = 0
+        self.errors = 0
+        for attr in Cue.FIELDS:
+            setattr(self, attr, None)
         self.header = []
         self.tracks = []
+        self.track_indices = set()
+        self.diagnostics = []
 
         if data is None:
             data = Path(path).read_bytes()
 
         if not data:
-            self.warn("empty file")
+            self.report(logging.WARNING, "empty-file")
             self.valid = False
             return
 
-        e = detect_encoding(data)
+        e = detect_encoding(data, encodings)
         if e not in VALID_ENCODINGS:
-            self.warn(f"Invalid encoding {Y(e)}")
+            self.report(logging.WARNING, "invalid-encoding", e)
             self.valid = False
             self.can_fix = True
 
         content = data.decode(e)
         try:
             for i, line in enumerate(content.splitlines()):
-                line = line.strip()
-                self.parse_line(i, line)
+                self.parse_line(i, line.strip())
         except CueException as e:
-            self.warn(str(e))
+            self.err(*e.args)
 
-        self.trace(f"valid={self.valid} can_fix={self.can_fix} errors={self.errors}")
-        self.trace(f"tracks={len(self.tracks)} files={len(self.files())}")
+        if L.isEnabledFor(logging.DEBUG):
+            self.trace(
+                f"valid={self.valid} can_fix={self.can_fix} errors={self.errors}"
+            )
+            self.trace(f"tracks={len(self.tracks)} files={len(self.files())}")
+
+
+# Tag dispatch table: "TITLE" -> Cue.parse_TITLE, etc.
+PARSERS = {
+    name[6:]: fn
+    for name, fn in vars(Cue).items()
+    if name.startswith("parse_") and name[6:].isupper()
+}
 
 
 if __name__ == "__main__":
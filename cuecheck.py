@@ -0,0 +1,252 @@
+import json
+import logging
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from hashlib import sha1
+from itertools import islice
+from pathlib import Path
+from shutil import copy2
+from tempfile import mkstemp
+from typing import Iterable, Optional, Tuple
+
+from .audio import audio_info
+from .cue import FRAMES_PER_SECOND, Cue, Track, fmt_msf
+from .files import cue_paths
+
+BATCH_SIZE = 64  # files per worker task
+
+
+@dataclass
+class CueResult:
+    path: str
+    digest: str = None
+    valid: bool = False
+    skipped: bool = False
+    fixed: bool = False
+    errors: list[str] = field(default_factory=list)
+
+
+@dataclass
+class Summary:
+    files: int = 0
+    valid: int = 0
+    fixed: int = 0
+    skipped: int = 0
+    errors: dict[str, int] = field(default_factory=dict)
+    failed: list[str] = field(default_factory=list)
+
+    def add(self, r: CueResult) -> None:
+        self.files += 1
+        self.valid += r.valid
+        self.fixed += r.fixed
+        self.skipped += r.skipped
+        for e in r.errors:
+            self.errors[e] = self.errors.get(e, 0) + 1
+        if not r.valid:
+            self.failed.append(r.path)
+
+
+def rewrite(path: str, data: bytes, backup: bool = False) -> None:
+    """Atomically replace file contents, optionally keeping .bak copy"""
+    fd, tmp = mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+            if backup:
+                copy2(path, path + ".bak")
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def file_frames(path: Path, track: Track) -> Tuple[Optional[int], str]:
+    """Returns length of CUE referenced file in CD frames, None if unknown"""
+    if track.ftype in ("BINARY", "MOTOROLA"):
+        return path.stat().st_size // track.sector_size, None
+    if track.ftype == "MP3":
+        return None, None
+
+    with open(path, "rb") as f:
+        info, err = audio_info(f)
+    if err:
+        return None, err
+    if not info.rate:
+        return None, "Invalid sample rate 0"
+    if info.samples is None:
+        return None, None
+    return info.samples * FRAMES_PER_SECOND // info.rate, None
+
+
+def verify_files(cue: Cue) -> list[Tuple[str, str]]:
+    """Check that files referenced by CUE exist and contain all INDEX entries"""
+    """  Returns list of (code, description) problems: "missing-file",
+    "audio-header" which could not be read or "index-range" beyond file end.
+    Only headers of referenced files are read."""
+    problems = []
+    base = Path(cue.path).parent
+    frames = None
+    for t in cue.tracks:
+        if t.file:
+            path = base / t.file
+            try:
+                frames, err = file_frames(path, t)
+            except OSError as e:
+                frames = None
+                problems.append(("missing-file", f"{t.file}: {e.strerror}"))
+                continue
+            if err:
+                problems.append(("audio-header", f"{t.file}: {err}"))
+        if frames is None or len(t.indices) <= t.split:
+            continue
+        last, ts = t.indices[-1]
+        if ts >= frames:
+            problems.append(
+                (
+                    "index-range",
+                    f"TRACK {t.index:02d} INDEX {last:02d} {fmt_msf(ts)}"
+                    f" beyond end of file {fmt_msf(frames)}",
+                )
+            )
+    return problems
+
+
+def check_cue(
+    path: str,
+    known: str = None,
+    fix: bool = False,
+    backup: bool = False,
+    verify: bool = False,
+) -> CueResult:
+    """Validate CUE file and fix its encoding if requested"""
+    """  known is state_key() of the file from previous successful run,
+    verify enables checking of referenced files"""
+    r = CueResult(path)
+    try:
+        data = Path(path).read_bytes()
+    except OSError:
+        r.errors.append("io")
+        return r
+
+    r.digest = sha1(data).hexdigest()
+    # sheet which passed verification is also valid without it
+    if known in (state_key(r.digest, verify), state_key(r.digest, True)):
+        r.valid = r.skipped = True
+        return r
+
+    try:
+        cue = Cue(path, data)
+        if verify:
+            for code, message in verify_files(cue):
+                cue.err(code, message)
+    except (LookupError, TypeError, ValueError) as e:
+        # malformed sheet which parser does not handle, e.g. "INDEX x"
+        logging.getLogger("kstools.cue").error(f"{path}: {e!r}")
+        r.errors.append("parse")
+        return r
+
+    r.valid = cue.valid
+    r.errors = [d.code for d in cue.diagnostics]
+    if fix and cue.can_fix and r.errors == ["invalid-encoding"]:
+        data = cue.utf8()
+        try:
+            rewrite(path, data, backup)
+        except OSError:
+            r.errors.append("io")
+            return r
+        r.digest = sha1(data).hexdigest()
+        r.valid = r.fixed = True
+
+    return r
+
+
+def state_key(digest: str, verify: bool) -> str:
+    """Returns state value of valid file checked with given options"""
+    return f"{digest}+verify" if verify else digest
+
+
+def load_state(path: Optional[str]) -> dict[str, str]:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(path: str, state: dict[str, str]) -> None:
+    rewrite(path, json.dumps(state, indent=1, sort_keys=True).encode("utf-8"))
+
+
+def _check_cues(tasks: list[tuple]) -> list[CueResult]:
+    return [check_cue(*args) for args in tasks]
+
+
+def check_cues(
+    paths: Iterable[str],
+    fix: bool = False,
+    backup: bool = False,
+    state: str = None,
+    jobs: int = None,
+    verify: bool = False,
+) -> Summary:
+    """Validate (and fix) CUE files in process pool"""
+    """  state is JSON file with digests of valid files, which are skipped"""
+    known = load_state(state)
+    tasks = ((p, known.get(p), fix, backup, verify) for p in paths)
+    summary = Summary()
+
+    def add(results: list[CueResult]) -> None:
+        for r in results:
+            summary.add(r)
+            if not r.valid:
+                known.pop(r.path, None)
+            elif not r.skipped:
+                known[r.path] = state_key(r.digest, verify)
+
+    # batches are submitted as results come back, so paths are not all
+    # queued in memory before the first result
+    jobs = jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(jobs) as pool:
+        running = deque()
+        while batch := list(islice(tasks, BATCH_SIZE)):
+            if len(running) >= 2 * jobs:
+                add(running.popleft().result())
+            running.append(pool.submit(_check_cues, batch))
+        while running:
+            add(running.popleft().result())
+    if state:
+        save_state(state, known)
+    return summary
+
+
+def main(argv: list[str]) -> int:
+    from argparse import ArgumentParser
+
+    p = ArgumentParser(description="Validate and fix CUE files")
+    p.add_argument("paths", nargs="+", help="CUE files or directories")
+    p.add_argument("--fix", action="store_true", help="re-encode to UTF-8")
+    p.add_argument("--backup", action="store_true", help="keep .bak copies")
+    p.add_argument("--state", help="JSON file to skip unchanged valid files")
+    p.add_argument("--jobs", type=int, help="number of worker processes")
+    p.add_argument("--verify", action="store_true", help="check referenced files")
+    p.add_argument("--verbose", action="store_true", help="log found errors")
+    args = p.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR if args.verbose else logging.CRITICAL)
+    paths = cue_paths(args.paths)
+    summary = check_cues(
+        paths, args.fix, args.backup, args.state, args.jobs, args.verify
+    )
+    json.dump(asdict(summary), sys.stdout, indent=1)
+    print()
+    return 1 if summary.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
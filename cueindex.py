@@ -0,0 +1,185 @@
+import logging
+import os
+import sqlite3
+import sys
+from typing import Iterable, Optional, Tuple
+
+from .cue import Cue
+from .files import cue_paths
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime INTEGER,
+    valid INTEGER,
+    performer TEXT COLLATE NOCASE,
+    title TEXT COLLATE NOCASE,
+    genre TEXT COLLATE NOCASE,
+    date TEXT,
+    catalog TEXT,
+    discid TEXT COLLATE NOCASE
+);
+CREATE TABLE IF NOT EXISTS tracks (
+    path TEXT REFERENCES files(path) ON DELETE CASCADE,
+    number INTEGER,
+    performer TEXT COLLATE NOCASE,
+    title TEXT COLLATE NOCASE,
+    isrc TEXT COLLATE NOCASE,
+    start INTEGER,
+    end INTEGER
+);
+CREATE INDEX IF NOT EXISTS files_performer ON files(performer);
+CREATE INDEX IF NOT EXISTS files_title ON files(title);
+CREATE INDEX IF NOT EXISTS files_genre ON files(genre);
+CREATE INDEX IF NOT EXISTS files_catalog ON files(catalog);
+CREATE INDEX IF NOT EXISTS files_discid ON files(discid);
+CREATE INDEX IF NOT EXISTS tracks_path ON tracks(path);
+CREATE INDEX IF NOT EXISTS tracks_performer ON tracks(performer);
+CREATE INDEX IF NOT EXISTS tracks_title ON tracks(title);
+CREATE INDEX IF NOT EXISTS tracks_isrc ON tracks(isrc);
+"""
+
+FILE_FIELDS = ("performer", "title", "genre", "date", "catalog", "discid")
+TRACK_FIELDS = ("performer", "title", "isrc")
+
+# (path, TRACK number or None for whole CUE match)
+Match = Tuple[str, Optional[int]]
+
+
+def header_value(cue: Cue, prefix: str) -> Optional[str]:
+    """Returns unquoted value of header line, e.g. "CATALOG " one"""
+    for h in cue.header:
+        if h.startswith(prefix):
+            return h[len(prefix) :].strip('"')
+    return None
+
+
+class CueIndex:
+    """SQLite index of CUE header and track fields"""
+
+    def __init__(self, path: str):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self) -> "CueIndex":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def add(self, path: str, st: os.stat_result) -> None:
+        cue = Cue(path)
+        values = (
+            cue.performer,
+            cue.title,
+            cue.genre,
+            cue.date,
+            header_value(cue, "CATALOG "),
+            header_value(cue, "REM DISCID "),
+        )
+        self.db.execute("DELETE FROM files WHERE path = ?", (path,))
+        self.db.execute(
+            "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, st.st_size, st.st_mtime_ns, cue.valid) + values,
+        )
+        self.db.executemany(
+            "INSERT INTO tracks VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (path, t.index, t.performer, t.title, t.isrc, t.start, t.end)
+                for t in cue.tracks
+            ),
+        )
+
+    def add_invalid(self, path: str, st: os.stat_result) -> None:
+        """Index file which could not be parsed, without fields and tracks"""
+        self.db.execute("DELETE FROM files WHERE path = ?", (path,))
+        self.db.execute(
+            "INSERT INTO files (path, size, mtime, valid) VALUES (?, ?, ?, 0)",
+            (path, st.st_size, st.st_mtime_ns),
+        )
+
+    def update(self, paths: Iterable[str], prune: bool = False) -> Tuple[int, int]:
+        """Parse CUE files which are new or changed since last update"""
+        """  prune removes files which are not in paths from the index.
+        Returns number of parsed and removed files."""
+        known = {
+            p: (size, mtime)
+            for p, size, mtime in self.db.execute("SELECT path, size, mtime FROM files")
+        }
+        parsed = 0
+        with self.db:
+            for path in paths:
+                # absolute paths are pruned correctly from any directory
+                path = os.path.abspath(path)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if known.pop(path, None) == (st.st_size, st.st_mtime_ns):
+                    continue
+                try:
+                    self.add(path, st)
+                except OSError as e:
+                    logging.getLogger("kstools.cue").warning(f"{path}: {e}")
+                    continue
+                except (LookupError, TypeError, ValueError) as e:
+                    # malformed sheet is indexed as invalid, like "parse"
+                    # error of cuecheck, and is not parsed again till changed
+                    logging.getLogger("kstools.cue").warning(f"{path}: {e!r}")
+                    self.add_invalid(path, st)
+                parsed += 1
+            if not prune:
+                return parsed, 0
+            self.db.executemany(
+                "DELETE FROM files WHERE path = ?", ((p,) for p in known)
+            )
+        return parsed, len(known)
+
+    def query(self, field: str, value: str) -> list[Match]:
+        """Returns CUE files and tracks with field equal to value"""
+        """  Text fields are compared case insensitive."""
+        if field not in FILE_FIELDS and field not in TRACK_FIELDS:
+            raise ValueError(f"Unknown field {field}")
+
+        matches = []
+        if field in FILE_FIELDS:
+            sql = f"SELECT path, NULL FROM files WHERE {field} = ?"
+            matches += self.db.execute(sql, (value,))
+        if field in TRACK_FIELDS:
+            sql = f"SELECT path, number FROM tracks WHERE {field} = ?"
+            matches += self.db.execute(sql, (value,))
+        return matches
+
+
+def main(argv: list[str]) -> int:
+    from argparse import ArgumentParser
+
+    p = ArgumentParser(description="Index and search CUE files")
+    p.add_argument("db", help="index database file")
+    p.add_argument("--update", nargs="+", metavar="PATH", help="CUE files or dirs")
+    p.add_argument("--prune", action="store_true", help="drop files not found")
+    for field in sorted(set(FILE_FIELDS + TRACK_FIELDS)):
+        p.add_argument(f"--{field}", help=f"find by {field}")
+    args = p.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR)
+    with CueIndex(args.db) as index:
+        if args.update:
+            parsed, removed = index.update(cue_paths(args.update), args.prune)
+            print(f"parsed={parsed} removed={removed}", file=sys.stderr)
+        for field in sorted(set(FILE_FIELDS + TRACK_FIELDS)):
+            value = getattr(args, field)
+            if value is None:
+                continue
+            for path, track in index.query(field, value):
+                print(path if track is None else f"{path}:{track:02d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,150 @@
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import IO, NamedTuple, Optional, Tuple
+
+from .cue import Cue
+from .cuesplit import copy_range
+
+iso_exts = ("iso",)
+
+# Offset of 2048 byte user data in sectors of data track types.
+# Raw sectors start with 12 bytes sync and 4 bytes header, Mode 2 form 1
+# sectors also have 8 bytes subheader; EDC/ECC follows user data.
+USER_DATA = {
+    "MODE1/2048": 0,
+    "MODE1/2352": 16,
+    "MODE2/2048": 0,
+    "MODE2/2336": 8,
+    "MODE2/2352": 24,
+    "CDI/2336": 8,
+    "CDI/2352": 24,
+}
+USER_DATA_SIZE = 2048
+
+# ISO9660 volume descriptors start at sector 16
+ISO_VD_SECTOR = 16
+ISO_VD_ID = b"CD001"
+
+BATCH_SECTORS = 4096  # ~9.2M of raw sectors per read
+
+
+class DataTrack(NamedTuple):
+    track: int
+    source: str
+    sector_size: int
+    offset: int  # user data offset in sector
+    start: int  # first sector in source file
+    count: Optional[int]  # number of sectors, None till end of file
+
+
+def data_track(cue: Cue) -> Tuple[DataTrack, str]:
+    """Returns first data track of CUE"""
+    base = Path(cue.path).parent
+    file = ftype = None
+    for t in cue.tracks:
+        if t.file:
+            file, ftype = t.file, t.ftype
+        if t.ttype == "AUDIO":
+            continue
+        if t.ttype not in USER_DATA:
+            return (None, f"TRACK {t.index:02d} {t.ttype} can't be converted to ISO")
+        if not file or ftype != "BINARY":
+            return (None, f"TRACK {t.index:02d} is not in BINARY file")
+        # pregap between INDEX 00 and INDEX 01 is not part of the filesystem
+        start = t.index_frames(1)
+        if start is None:
+            return (None, f"TRACK {t.index:02d} has no INDEX 01")
+        size = t.sector_size
+        count = None if t.end is None else t.end - start
+        track = DataTrack(
+            t.index, str(base / file), size, USER_DATA[t.ttype], start, count
+        )
+        return (track, None)
+    return (None, "No data tracks")
+
+
+def strip_sectors(src: IO[bytes], dst: IO[bytes], track: DataTrack) -> int:
+    """Copy user data of raw sectors from src to dst, returns sectors copied"""
+    """  Reads BATCH_SECTORS sectors at once and slices user data of the whole
+    batch with memoryview, so per-sector cost is one slice, not a read."""
+    size, offs = track.sector_size, track.offset
+    buf = bytearray(size * BATCH_SECTORS)
+    view = memoryview(buf)
+    src.seek(track.start * size)
+    left = track.count
+    copied = 0
+    while left is None or left > 0:
+        n = BATCH_SECTORS if left is None else min(left, BATCH_SECTORS)
+        got = src.readinto(view[: n * size]) // size
+        if not got:
+            break
+        end = got * size
+        dst.write(
+            b"".join(view[i : i + USER_DATA_SIZE] for i in range(offs, end, size))
+        )
+        copied += got
+        if left is not None:
+            left -= got
+        if got < n:
+            break
+    return copied
+
+
+def write_iso(track: DataTrack, dst: IO[bytes]) -> int:
+    """Write user data of data track into dst, returns number of sectors"""
+    with open(track.source, "rb", buffering=0) as src:
+        if track.sector_size != USER_DATA_SIZE:
+            return strip_sectors(src, dst, track)
+
+        # cooked sectors are copied inside kernel
+        total = os.fstat(src.fileno()).st_size // USER_DATA_SIZE - track.start
+        count = total if track.count is None else min(track.count, total)
+        dst.flush()
+        start = track.start * USER_DATA_SIZE
+        copy_range(src.fileno(), dst.fileno(), start, count * USER_DATA_SIZE)
+        return count
+
+
+def is_iso(path: str) -> bool:
+    """Check ISO9660 volume descriptor"""
+    with open(path, "rb") as f:
+        f.seek(ISO_VD_SECTOR * USER_DATA_SIZE)
+        return f.read(6)[1:] == ISO_VD_ID
+
+
+def cue_to_iso(cue: Cue, path: str) -> Tuple[int, str]:
+    """Convert first data track of CUE to ISO image at path"""
+    """  Returns number of written sectors and error."""
+    track, err = data_track(cue)
+    if err:
+        return (0, err)
+    try:
+        with open(path, "wb") as dst:
+            count = write_iso(track, dst)
+    except (OSError, EOFError) as e:
+        return (0, str(e))
+    if not is_iso(path):
+        return (count, "ISO9660 volume descriptor not found")
+    return (count, None)
+
+
+def main(argv: list[str]) -> int:
+    from argparse import ArgumentParser
+
+    p = ArgumentParser(description="Convert BIN/CUE data track to ISO")
+    p.add_argument("cue", help="CUE file")
+    p.add_argument("iso", help="output ISO file")
+    args = p.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    count, err = cue_to_iso(Cue(args.cue), args.iso)
+    print(f"sectors={count}", file=sys.stderr)
+    if err:
+        print(err, file=sys.stderr)
+    return 1 if err else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,172 @@
+import logging
+import os
+import sys
+from pathlib import Path
+from struct import Struct
+from typing import IO, NamedTuple, Tuple
+
+from .audio import AudioInfo, audio_info
+from .cue import FRAMES_PER_SECOND, Cue, Track
+
+# Canonical PCM WAVE header: RIFF, fmt and data chunk headers
+WAVHDR = Struct("<4sI4s4sIHHIIHH4sI")
+
+COPY_CHUNK = 1 << 30
+
+
+class Piece(NamedTuple):
+    track: int
+    source: str
+    offset: int
+    length: int
+    header: bytes  # written before the data, e.g. WAVE header
+    ext: str
+
+    @property
+    def name(self) -> str:
+        return f"{self.track:02d}.{self.ext}"
+
+
+def wave_header(info: AudioInfo, length: int) -> bytes:
+    align = info.channels * info.bits // 8
+    return WAVHDR.pack(
+        b"RIFF",
+        WAVHDR.size - 8 + length,
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,  # PCM
+        info.channels,
+        info.rate,
+        info.rate * align,
+        align,
+        info.bits,
+        b"data",
+        length,
+    )
+
+
+def file_layout(path: Path, track: Track) -> Tuple[int, int, int, AudioInfo, str]:
+    """Returns data offset, data size, bytes per CD frame and audio info"""
+    if track.ftype in ("BINARY", "MOTOROLA"):
+        return 0, path.stat().st_size, track.sector_size, None, None
+
+    with open(path, "rb") as f:
+        info, err = audio_info(f)
+    if err:
+        return 0, 0, 0, None, err
+    if not info.offset:
+        return 0, 0, 0, None, "Only WAVE audio files can be split"
+    align = info.channels * info.bits // 8
+    frame = info.rate * align // FRAMES_PER_SECOND
+    return info.offset, info.samples * align, frame, info, None
+
+
+def plan(cue: Cue) -> Tuple[list[Piece], list[str]]:
+    """Compute byte ranges of every track in files referenced by CUE"""
+    """  Returns list of pieces and list of errors. Tracks start at their
+    first INDEX, so gaps go to the beginning of tracks. Pregap which is
+    in the previous FILE (FILE between INDEX 00 and INDEX 01) can't start
+    its track, so it is kept at the end of the previous track. Byte
+    offsets in BINARY files use sector size of every track."""
+    pieces, errors = [], []
+    base = Path(cue.path).parent
+    layout = None
+    for i, t in enumerate(cue.tracks):
+        if t.file:
+            path = base / t.file
+            try:
+                layout = file_layout(path, t)
+            except OSError as e:
+                layout = None
+                errors.append(f"{t.file}: {e.strerror}")
+                continue
+            if layout[4]:
+                errors.append(f"{t.file}: {layout[4]}")
+                layout = None
+            # CD frame and byte position of the previous track start, tracks
+            # of one BINARY file may differ in sector size
+            mark = (0, 0, layout[2] if layout else 0)
+        if not layout:
+            continue
+        if t.start is None:
+            errors.append(f"TRACK {t.index:02d} has no INDEX")
+            continue
+
+        offset, size, frame, info, _ = layout
+        if not info:
+            frame = t.sector_size
+        start = mark[1] + (t.start - mark[0]) * mark[2]
+        mark = (t.start, start, frame)
+        following = cue.tracks[i + 1] if i + 1 < len(cue.tracks) else None
+        end = None if following and following.split else t.end
+        end = size if end is None else min(start + (end - t.start) * frame, size)
+        if start >= end:
+            errors.append(f"TRACK {t.index:02d} is out of file bounds")
+            continue
+
+        length = end - start
+        header = wave_header(info, length) if info else b""
+        ext = "wav" if info else "bin"
+        pieces.append(Piece(t.index, str(path), offset + start, length, header, ext))
+    return pieces, errors
+
+
+def copy_range(src: int, dst: int, offset: int, length: int) -> None:
+    """Copy file range inside kernel where possible"""
+    while length > 0:
+        n = min(length, COPY_CHUNK)
+        if hasattr(os, "copy_file_range"):
+            try:
+                n = os.copy_file_range(src, dst, n, offset)
+            except OSError:
+                n = os.sendfile(dst, src, offset, n)
+        else:
+            n = os.sendfile(dst, src, offset, n)
+        if not n:
+            raise EOFError(f"Unexpected EOF at {offset}")
+        offset += n
+        length -= n
+
+
+def write_piece(piece: Piece, out: IO[bytes]) -> None:
+    out.write(piece.header)
+    out.flush()
+    with open(piece.source, "rb") as src:
+        copy_range(src.fileno(), out.fileno(), piece.offset, piece.length)
+
+
+def split(pieces: list[Piece], outdir: str) -> list[str]:
+    """Write planned pieces into outdir, returns written file paths"""
+    written = []
+    for piece in pieces:
+        path = os.path.join(outdir, piece.name)
+        with open(path, "wb") as out:
+            write_piece(piece, out)
+        written.append(path)
+    return written
+
+
+def main(argv: list[str]) -> int:
+    from argparse import ArgumentParser
+
+    p = ArgumentParser(description="Split WAVE/BINARY CUE images into tracks")
+    p.add_argument("cue", help="CUE file")
+    p.add_argument("outdir", help="output directory")
+    p.add_argument("-n", "--dry-run", action="store_true", help="only print plan")
+    args = p.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    pieces, errors = plan(Cue(args.cue))
+    for e in errors:
+        print(e, file=sys.stderr)
+    for piece in pieces:
+        print(f"{piece.name}: {piece.source} {piece.offset}+{piece.length}")
+    if not args.dry_run and not errors:
+        os.makedirs(args.outdir, exist_ok=True)
+        split(pieces, args.outdir)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
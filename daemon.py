@@ -0,0 +1,264 @@
+import asyncio
+import json
+import logging
+import os
+import stat
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from .pool import image_fd_size
+from .types import ImageSizeResult
+
+log = logging.getLogger("kstools.daemon")
+
+# (st_dev, st_ino, st_size, st_mtime_ns) of the file a result belongs to
+FileKey = Tuple[int, int, int, int]
+
+
+def file_key(st: os.stat_result) -> FileKey:
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def export(path: str, result: ImageSizeResult) -> dict:
+    """Returns JSON representation of image size result"""
+    size, err = result
+    if err:
+        return {"path": path, "error": err}
+    return {"path": path, "type": type(size).__name__, **dict(size.fields())}
+
+
+def remove_socket(path: str) -> None:
+    """Removes stale Unix socket, refuses to remove any other file"""
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(st.st_mode):
+        raise FileExistsError(f"{path} exists and is not a socket")
+    os.unlink(path)
+
+
+class LRU(OrderedDict):
+    """Bounded mapping which drops least recently used items"""
+
+    def __init__(self, maxsize: int):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def lookup(self, key):
+        value = self.get(key)
+        if value is not None:
+            self.move_to_end(key)
+        return value
+
+    def put(self, key, value) -> list:
+        """Returns evicted values"""
+        self[key] = value
+        self.move_to_end(key)
+        evicted = []
+        while len(self) > self.maxsize:
+            evicted.append(self.popitem(last=False)[1])
+        return evicted
+
+
+class FdCache:
+    """Bounded cache of open read-only file descriptors"""
+
+    """  Used only from event loop thread. Descriptors are reference counted
+    while workers read them, evicted ones are closed on last release."""
+
+    def __init__(self, maxsize: int):
+        self.fds = LRU(maxsize)
+        self.refs: dict[int, int] = {}
+        self.evicted: set[int] = set()
+
+    def acquire(self, path: str, st: os.stat_result) -> int:
+        ino = (st.st_dev, st.st_ino)
+        cached = self.fds.lookup(path)
+        if cached and cached[0] == ino:
+            fd = cached[1]
+        else:
+            fd = os.open(path, os.O_RDONLY)
+            evicted = self.fds.put(path, (ino, fd))
+            if cached:
+                evicted.append(cached)
+            for _, old in evicted:
+                self.evict(old)
+        self.refs[fd] = self.refs.get(fd, 0) + 1
+        return fd
+
+    def release(self, fd: int) -> None:
+        self.refs[fd] -= 1
+        if not self.refs[fd]:
+            del self.refs[fd]
+            if fd in self.evicted:
+                self.evicted.discard(fd)
+                os.close(fd)
+
+    def evict(self, fd: int) -> None:
+        if fd in self.refs:
+            self.evicted.add(fd)
+        else:
+            os.close(fd)
+
+    def close(self) -> None:
+        for _, fd in self.fds.values():
+            self.evict(fd)
+        self.fds.clear()
+
+
+class ImageSizeServer:
+    """Answers image size queries over Unix socket"""
+
+    """  Protocol is one JSON object per line: request {"paths": [...]},
+    response {"results": [...]} with export() of every path in order.
+    Results are cached by path until file size, mtime or inode changes."""
+
+    def __init__(
+        self,
+        path: str,
+        cache_size: int = 65536,
+        fd_cache_size: int = 256,
+        workers: int = None,
+        line_limit: int = 1 << 24,
+    ):
+        self.path = path
+        self.line_limit = line_limit
+        self.results = LRU(cache_size)
+        self.fds = FdCache(fd_cache_size)
+        self.pool = ThreadPoolExecutor(workers)
+        self.pending: dict[Tuple[str, FileKey], asyncio.Future] = {}
+        self.hits = self.misses = 0
+
+    async def parse(self, path: str, st: os.stat_result) -> dict:
+        key = file_key(st)
+        try:
+            fd = self.fds.acquire(path, st)
+        except OSError as e:
+            del self.pending[(path, key)]
+            return {"path": path, "error": str(e)}
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.pool, image_fd_size, fd)
+        except Exception as e:
+            # parser bug on malformed file fails only this path
+            log.debug(f"{path}: parser failed", exc_info=True)
+            result = (None, f"{type(e).__name__}: {e}")
+        finally:
+            self.fds.release(fd)
+            del self.pending[(path, key)]
+        value = export(path, result)
+        self.results.put(path, (key, value))
+        return value
+
+    async def lookup(self, path: str) -> dict:
+        # os.stat() would take an int as file descriptor
+        if not isinstance(path, str):
+            return {"path": path, "error": "Path is not a string"}
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            return {"path": path, "error": str(e)}
+
+        key = file_key(st)
+        cached = self.results.lookup(path)
+        if cached and cached[0] == key:
+            self.hits += 1
+            return cached[1]
+
+        # concurrent requests of the same file share one parse
+        self.misses += 1
+        task = self.pending.get((path, key))
+        if not task:
+            task = asyncio.ensure_future(self.parse(path, st))
+            self.pending[(path, key)] = task
+        return await task
+
+    async def request(self, line: bytes) -> dict:
+        try:
+            paths = json.loads(line)["paths"]
+        except (ValueError, KeyError, TypeError) as e:
+            return {"error": f"Bad request: {e}"}
+        if not isinstance(paths, list):
+            return {"error": "Bad request: paths is not a list"}
+        results = await asyncio.gather(
+            *(self.lookup(p) for p in paths), return_exceptions=True
+        )
+        for i, r in enumerate(results):
+            if isinstance(r, Exception):
+                results[i] = {"path": paths[i], "error": f"{type(r).__name__}: {r}"}
+        return {"results": results}
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError as e:
+                    # line over the limit, rest of it would be a bad request
+                    await self.reply(writer, {"error": f"Bad request: {e}"})
+                    break
+                if not line:
+                    break
+                await self.reply(writer, await self.request(line))
+        except ConnectionError as e:
+            log.debug(f"Client error: {e}")
+        finally:
+            writer.close()
+
+    async def reply(self, writer: asyncio.StreamWriter, response: dict) -> None:
+        writer.write(json.dumps(response).encode("utf-8") + b"\n")
+        await writer.drain()
+
+    async def serve(self, ready: Optional[asyncio.Event] = None) -> None:
+        remove_socket(self.path)
+        server = await asyncio.start_unix_server(
+            self.handle, self.path, limit=self.line_limit
+        )
+        log.info(f"Listening on {self.path}")
+        if ready:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self.fds.close()
+        self.pool.shutdown()
+        try:
+            remove_socket(self.path)
+        except FileExistsError as e:
+            log.warning(f"Not removed: {e}")
+
+
+def main(argv: list[str]) -> int:
+    from argparse import ArgumentParser
+
+    p = ArgumentParser(description="Image size daemon")
+    p.add_argument("socket", help="Unix socket path")
+    p.add_argument("--cache", type=int, default=65536, help="cached results")
+    p.add_argument("--fds", type=int, default=256, help="cached file descriptors")
+    p.add_argument("--workers", type=int, help="parser threads")
+    p.add_argument("--verbose", action="store_true")
+    args = p.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    server = ImageSizeServer(args.socket, args.cache, args.fds, args.workers)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+    except FileExistsError as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,64 @@
+from struct import Struct
+from typing import IO
+
+from .magic import DDS
+from .types import ImageParser, ImageSizeResult, PreadStream, TextureSize, b2x
+
+dds_exts = ("dds",)
+
+# https://learn.microsoft.com/en-us/windows/win32/direct3ddds/dds-header
+HEADER = Struct("<4sIIIIIII44x")
+PIXELFORMAT = Struct("<II4s20x")
+CAPS = Struct("<II12x")
+DX10 = Struct("<IIIII")
+
+DDSD_DEPTH = 0x800000
+DDSD_MIPMAPCOUNT = 0x20000
+DDSCAPS2_CUBEMAP = 0x200
+DDS_RESOURCE_MISC_TEXTURECUBE = 0x4
+
+HEADER_SIZE = HEADER.size + PIXELFORMAT.size + CAPS.size
+DX10_SIZE = HEADER_SIZE + DX10.size
+
+
+class DdsParser(ImageParser):
+    def __init__(self, stream: IO[bytes]):
+        self.stream = PreadStream(stream)
+
+    def image_size(self) -> ImageSizeResult:
+        data = self.stream.pread(0, DX10_SIZE)
+        if len(data) < HEADER_SIZE:
+            return (None, "EOF")
+
+        sig, size, flags, h, w, _, depth, mips = HEADER.unpack(data[: HEADER.size])
+        if sig != DDS:
+            return (None, f"Wrong DDS signature {b2x(sig)}")
+        if size != HEADER_SIZE - 4:
+            return (None, f"Invalid DDS header size {size}")
+
+        data = data[HEADER.size :]
+        fourcc = PIXELFORMAT.unpack(data[: PIXELFORMAT.size])[2]
+        caps2 = CAPS.unpack(data[PIXELFORMAT.size : HEADER_SIZE - HEADER.size])[1]
+
+        sz = TextureSize(w, h)
+        if flags & DDSD_DEPTH and depth:
+            sz.depth = depth
+        if flags & DDSD_MIPMAPCOUNT and mips:
+            sz.mips = mips
+        if caps2 & DDSCAPS2_CUBEMAP:
+            sz.faces = 6
+
+        if fourcc == b"DX10":
+            data = data[HEADER_SIZE - HEADER.size :]
+            if len(data) < DX10.size:
+                return (None, "EOF")
+            _, _, misc, layers, _ = DX10.unpack(data)
+            sz.layers = layers or 1
+            if misc & DDS_RESOURCE_MISC_TEXTURECUBE:
+                sz.faces = 6
+
+        return (sz, None)
+
+
+def dds_image_size(stream: IO[bytes]) -> ImageSizeResult:
+    return DdsParser(stream).image_size()
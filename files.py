@@ -1,5 +1,9 @@
-from os import walk
-from os.path import splitext
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from os import DirEntry, cpu_count, scandir, walk
+from os.path import isdir, splitext
+from typing import Collection, Iterable, Iterator, Optional, Tuple
+
+cue_exts = ("cue",)
 
 
 def lowerext(name: str) -> str:
@@ -17,3 +21,77 @@ def filelist(path: str, **kwargs) -> list[str]:
     """Returns list of files in given directory"""
     """  **kwargs will be passed to underlaying os.walk() call"""
     return next(walk(path, **kwargs))[2]
+
+
+def match_ext(name: str, exts: Optional[Collection[str]]) -> bool:
+    if exts is None:
+        return True
+    return lowerext(name) in exts
+
+
+def scan_dir(path: str, exts: Optional[Collection[str]]) -> Tuple[list, list]:
+    """Returns matching file entries and subdirectory paths of one directory"""
+    files, dirs = [], []
+    try:
+        with scandir(path) as it:
+            for e in it:
+                # is_dir()/is_file() use d_type, no stat() call on most systems
+                if e.is_dir(follow_symlinks=False):
+                    dirs.append(e.path)
+                elif match_ext(e.name, exts) and e.is_file():
+                    files.append(e)
+    except OSError:
+        pass
+    return files, dirs
+
+
+def scanfiles(path: str, exts: Collection[str] = None) -> Iterator[DirEntry]:
+    """Recursively yields DirEntry of files with extension from exts"""
+    """  exts should be a set of lower case extensions without dot"""
+    pending = [path]
+    while pending:
+        try:
+            it = scandir(pending.pop())
+        except OSError:
+            continue
+        with it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    pending.append(e.path)
+                elif match_ext(e.name, exts) and e.is_file():
+                    yield e
+
+
+def scanfiles_parallel(
+    path: str, exts: Collection[str] = None, workers: int = None
+) -> Iterator[DirEntry]:
+    """Same as scanfiles(), but directories are listed in thread pool"""
+    """  At most 2 listings per worker are outstanding and entries are yielded
+    as soon as each directory is listed. Paths of directories not listed yet
+    are kept like in scanfiles() and taken depth first, so they grow with
+    tree width, but file entries of only a few listings are held at once."""
+    workers = workers or min(32, (cpu_count() or 1) + 4)
+    with ThreadPoolExecutor(workers) as pool:
+        pending = [path]
+        running = set()
+        try:
+            while pending or running:
+                while pending and len(running) < 2 * workers:
+                    running.add(pool.submit(scan_dir, pending.pop(), exts))
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for job in done:
+                    files, dirs = job.result()
+                    pending.extend(dirs)
+                    yield from files
+        finally:
+            for job in running:
+                job.cancel()
+
+
+def cue_paths(roots: Iterable[str]) -> Iterator[str]:
+    """Yields CUE files found in directories of roots and other roots as is"""
+    for root in roots:
+        if isdir(root):
+            yield from (e.path for e in scanfiles(root, cue_exts))
+        else:
+            yield root
@@ -1,4 +1,5 @@
 from .isobmff import IFFParser as HeifParsr  # noqa: F401
 from .isobmff import isobmff_image_size as heif_image_size  # noqa: F401
+from .isobmff import heif_contents  # noqa: F401
 
 heif_exts = ("heic", "heif")
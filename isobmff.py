@@ -1,24 +1,95 @@
-from dataclasses import dataclass
+from io import BytesIO
+from math import atan2, degrees
 from struct import Struct
-from typing import IO
+from typing import IO, Iterator, Tuple
 
-from .types import ImageParser, ImageSize, ImageSizeResult, PreadStream
+from .magic import QTBOXES
+from .types import (
+    ForwardStream,
+    ImageParser,
+    ImageSize,
+    ImageSizeResult,
+    PreadStream,
+    VideoSize,
+)
 
 iso_exts = ("avif", "heic", "heif")
+mov_exts = ("m4v", "mov", "mp4")
 
 BOX = Struct(">I4s")
+LARGESIZE = Struct(">Q")
+UNKNOWN_SIZE = 1 << 63
 ISPE = Struct(">IIII")
 
+# https://developer.apple.com/documentation/quicktime-file-format
+# full box version and flags are followed by creation/modification times,
+# which are 64 bit in version 1
+MVHD = {0: Struct(">4x4x4xII"), 1: Struct(">4x8x8xIQ")}  # timescale, duration
+TKHD = {0: Struct(">4x4x4xI4xI"), 1: Struct(">4x8x8xI4xQ")}  # track ID, duration
+TKHD_TAIL = Struct(">8x2x2x2x2x9iII")  # matrix, width, height
+HDLR = Struct(">4x4x4s")  # handler type
+STSD = Struct(">4xII4s6x2x16xHH")  # count, first entry size, format, w, h
+
+VISUAL_HANDLERS = (b"pict", b"vide", b"auxv")
+
+# ftyp brands of files whose image is primary item of meta, which may have
+# moov with image sequence or preview video too
+HEIF_BRANDS = (b"mif1", b"mif2", b"heic", b"heix", b"heim", b"heis", b"avif")
+
+# item reference types which give role of referencing item
+REF_ROLES = {b"thmb": "thumbnail", b"auxl": "auxiliary", b"cdsc": "metadata"}
+
+
+class Item:
+    # plain classes rather than dataclasses, which are slow to import
+    __slots__ = ("id", "type", "width", "height", "role", "ref")
+
+    def __init__(
+        self,
+        id: int,
+        type: str,  # e.g. "hvc1", "av01", "grid", "Exif"
+        width: int = None,
+        height: int = None,
+        role: str = None,  # "primary", "thumbnail", "auxiliary", "tile" or "metadata"
+        ref: int = None,  # item which thumbnail, auxiliary or tile belongs to
+    ):
+        self.id = id
+        self.type = type
+        self.width = width
+        self.height = height
+        self.role = role
+        self.ref = ref
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={getattr(self, k)!r}" for k in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class MovieTrack:
+    __slots__ = ("id", "handler", "size")
+
+    def __init__(self, id: int, handler: str, size: VideoSize):
+        self.id = id
+        self.handler = handler  # "pict" for image sequences, "vide", "auxv"
+        self.size = size
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={getattr(self, k)!r}" for k in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
 
-@dataclass
 class Box:
-    offs: int
-    size: int
-    text: bytes
+    __slots__ = ("offs", "size", "text", "header")
+
+    def __init__(self, offs: int, size: int, text: bytes, header: int = 8):
+        self.offs = offs
+        self.size = size
+        self.text = text
+        self.header = header
 
     @property
     def start(self) -> int:
-        return self.offs + 8
+        return self.offs + self.header
 
     @property
     def end(self) -> int:
@@ -31,8 +102,12 @@ class Box:
 
 class BoxParser:
     def __init__(self, stream: IO[bytes]):
-        stream.seek(0, 2)
-        self.end = stream.tell()
+        if isinstance(stream, ForwardStream):
+            # size is unknown until the end is read; boxes are walked till EOF
+            self.end = UNKNOWN_SIZE
+        else:
+            stream.seek(0, 2)
+            self.end = stream.tell()
         self.stream = PreadStream(stream)
 
     def read_box(self, offs: int) -> Box:
@@ -41,12 +116,21 @@ class BoxParser:
             return None
         b = Box(offs, *BOX.unpack(data))
         if b.size == 1:
-            b.size = 8
+            # 64 bit largesize follows box type, e.g. in mdat of large videos
+            data = self.stream.read(LARGESIZE.size)
+            if len(data) < LARGESIZE.size:
+                return None
+            b.size = LARGESIZE.unpack(data)[0]
+            b.header += LARGESIZE.size
         if not b.size:
             b.size = self.end - b.offs
+        if b.size < b.header:
+            return None
         return b
 
     def find_box(self, text: bytes, offs: int, end: int) -> Box:
+        if offs >= end:
+            return None
         b = self.read_box(offs)
         while True:
             if not b:
@@ -58,6 +142,20 @@ class BoxParser:
             b = self.read_box(b.end)
         return None
 
+    def find_path(self, box: Box, *path: bytes) -> Box:
+        """Returns nested box, e.g. find_path(trak, b"mdia", b"hdlr")"""
+        for text in path:
+            box = self.find_box(text, box.start, box.end)
+            if not box:
+                return None
+        return box
+
+
+def rotation(matrix: tuple) -> int:
+    """Returns clockwise rotation in degrees of 16.16 fixed point matrix"""
+    a, b = matrix[0], matrix[1]
+    return round(degrees(atan2(b, a))) % 360
+
 
 class IFFParser(ImageParser, BoxParser):
     def image_size(self) -> ImageSizeResult:
@@ -66,10 +164,24 @@ class IFFParser(ImageParser, BoxParser):
             return (None, "Empty file")
 
         if b.text != b"ftyp":
+            if b.text in QTBOXES:
+                return self.video_size()
             return (None, "No ftyp box")
 
-        m = self.find_box(b"meta", b.end, self.end)
-        if not m:
+        # MP4 and MOV files have moov instead of meta on top level;
+        # both are looked for in one pass for ForwardStream
+        heif = self.is_heif(b)
+        moov = None
+        for m in self.children(b.end, self.end):
+            if m.text == b"moov":
+                if not heif:
+                    return self.video_size(m)
+                moov = moov or m
+            if m.text == b"meta":
+                break
+        else:
+            if moov:
+                return self.video_size(moov)
             return (None, "meta not found")
 
         b = self.find_box(b"iprp", m.start + 4, m.end)
@@ -108,6 +220,284 @@ class IFFParser(ImageParser, BoxParser):
 
         return (sz, error)
 
+    def is_heif(self, ftyp: Box) -> bool:
+        """Checks major and compatible brands of ftyp for HEIF brands"""
+        data = self.stream.pread(ftyp.start, min(ftyp.size - ftyp.header, 256))
+        brands = [data[i : i + 4] for i in range(0, len(data), 4)]
+        # minor version is not a brand
+        return any(b in HEIF_BRANDS for i, b in enumerate(brands) if i != 1)
+
+    def read_full(self, box: Box, formats: dict) -> tuple:
+        """Unpacks full box with version dependent layout"""
+        data = self.stream.pread(box.start, 1)
+        fmt = formats.get(data[0]) if data else None
+        if not fmt:
+            return None
+        data = self.stream.pread(box.start, fmt.size)
+        if len(data) < fmt.size:
+            return None
+        return fmt.unpack(data)
+
+    def read_track(
+        self, trak: Box, timescale: int, handlers: tuple = None
+    ) -> Tuple["MovieTrack", str]:
+        """Returns track description, (None, None) if handler is not in handlers"""
+        # boxes are visited in file order to suit ForwardStream
+        tkhd = self.find_box(b"tkhd", trak.start, trak.end)
+        if not tkhd:
+            return (None, "tkhd not found")
+        head = self.read_full(tkhd, TKHD)
+        if not head:
+            return (None, "Invalid tkhd")
+        track_id, duration = head
+        data = self.stream.read(TKHD_TAIL.size)
+        if len(data) < TKHD_TAIL.size:
+            return (None, "EOF")
+        *matrix, w, h = TKHD_TAIL.unpack(data)
+        # display size is 16.16 fixed point
+        w, h = w >> 16, h >> 16
+
+        mdia = self.find_box(b"mdia", tkhd.end, trak.end)
+        hdlr = self.find_box(b"hdlr", mdia.start, mdia.end) if mdia else None
+        if not hdlr:
+            return (None, "hdlr not found")
+        data = self.stream.pread(hdlr.start, HDLR.size)
+        if len(data) < HDLR.size:
+            return (None, "EOF")
+        handler = HDLR.unpack(data)[0]
+        if handlers and handler not in handlers:
+            return (None, None)
+
+        codec = None
+        minf = self.find_box(b"minf", hdlr.end, mdia.end)
+        stsd = self.find_path(minf, b"stbl", b"stsd") if minf else None
+        if stsd:
+            data = self.stream.pread(stsd.start, STSD.size)
+            if len(data) == STSD.size:
+                count, _, fmt, sw, sh = STSD.unpack(data)
+                codec = fmt.decode("ascii", errors="replace") if count else None
+                if not w or not h:
+                    w, h = sw, sh
+
+        rotate = rotation(matrix)
+        if rotate in (90, 270):
+            w, h = h, w
+        duration = duration / timescale if timescale else 0.0
+        size = VideoSize(w, h, duration, codec, rotate, tuple(matrix))
+        return (MovieTrack(track_id, handler.decode("ascii", "replace"), size), None)
+
+    def read_moov(self, moov: Box = None) -> Tuple[Box, int, str]:
+        """Returns moov box and movie timescale"""
+        moov = moov or self.find_box(b"moov", 0, self.end)
+        if not moov:
+            return (None, 0, "moov not found")
+
+        mvhd = self.find_box(b"mvhd", moov.start, moov.end)
+        head = self.read_full(mvhd, MVHD) if mvhd else None
+        if not head:
+            return (None, 0, "mvhd not found")
+        return (moov, head[0], None)
+
+    def video_size(self, moov: Box = None) -> ImageSizeResult:
+        """Returns size of the first video track of MP4/MOV file"""
+        """  Top-level boxes are skipped by their headers, so mdat before
+        moov is never read."""
+        moov, timescale, err = self.read_moov(moov)
+        if err:
+            return (None, err)
+
+        err = "Video track not found"
+        for trak in self.children(moov.start, moov.end):
+            if trak.text != b"trak":
+                continue
+            track, track_err = self.read_track(trak, timescale, (b"vide",))
+            if track:
+                return (track.size, None)
+            err = track_err or err
+        return (None, err)
+
+    def children(self, offs: int, end: int) -> Iterator[Box]:
+        while offs < end:
+            b = self.read_box(offs)
+            if not b:
+                return
+            yield b
+            offs = b.end
+
+    def load(self, box: Box) -> "IFFParser":
+        """Reads whole box at once; returns parser of box data at offset 0"""
+        data = self.stream.pread(box.offs, box.size)
+        return IFFParser(BytesIO(data))
+
+    def read_uint(self, size: int) -> int:
+        return int.from_bytes(self.stream.read(size), "big")
+
+    def read_version(self, box: Box) -> Tuple[int, str]:
+        """Returns version of full box, stream is left after flags"""
+        data = self.stream.pread(box.start, 4)
+        if len(data) < 4 or box.size - box.header < 4:
+            return (None, "EOF")
+        return (data[0], None)
+
+    def read_properties(self, ipco: Box) -> list[tuple]:
+        """Returns (width, height, rotation) of every property in ipco order"""
+        props = []
+        for b in self.children(ipco.start, ipco.end):
+            value = None
+            if b.text == b"ispe":
+                data = self.stream.pread(b.start, ISPE.size)
+                if len(data) == ISPE.size:
+                    value = ISPE.unpack(data)[1:3]
+            elif b.text == b"irot":
+                data = self.stream.pread(b.start, 1)
+                value = data[0] & 3 if data else 0
+            props.append((b.text, value))
+        return props
+
+    def read_associations(self, ipma: Box) -> dict[int, list[int]]:
+        """Returns 1-based ipco property indices of every item"""
+        version, err = self.read_version(ipma)
+        if err:
+            return {}
+        flags = self.stream.pread(ipma.start + 1, 3)[-1]
+        assoc = {}
+        for _ in range(self.read_uint(4)):
+            if self.stream.offs >= ipma.end:
+                break
+            item_id = self.read_uint(2 if version < 1 else 4)
+            indices = assoc.setdefault(item_id, [])
+            for _ in range(self.read_uint(1)):
+                if flags & 1:
+                    indices.append(self.read_uint(2) & 0x7FFF)
+                else:
+                    indices.append(self.read_uint(1) & 0x7F)
+        return assoc
+
+    def read_references(self, iref: Box) -> Iterator[Tuple[bytes, int, list[int]]]:
+        """Yields (type, from item, to items) of item references"""
+        version, err = self.read_version(iref)
+        if err:
+            return
+        size = 2 if version == 0 else 4
+        for b in self.children(iref.start + 4, iref.end):
+            self.stream.seek(b.start)
+            from_id = self.read_uint(size)
+            count = self.read_uint(2)
+            yield (b.text, from_id, [self.read_uint(size) for _ in range(count)])
+
+    def read_item_infos(self, iinf: Box) -> Iterator[Tuple[int, str]]:
+        """Yields (id, type) of items"""
+        version, err = self.read_version(iinf)
+        if err:
+            return
+        size = 2 if version == 0 else 4
+        for b in self.children(iinf.start + 4 + size, iinf.end):
+            if b.text != b"infe":
+                continue
+            version, err = self.read_version(b)
+            if err:
+                return
+            item_id = self.read_uint(4 if version >= 3 else 2)
+            item_type = ""
+            if version >= 2:
+                self.stream.skip(2)  # item_protection_index
+                item_type = self.stream.read(4).decode("ascii", "replace")
+            yield (item_id, item_type)
+
+    def meta_items(self, meta: Box) -> list[Item]:
+        items: dict[int, Item] = {}
+        props, assoc, refs = [], {}, []
+        primary = None
+        for b in self.children(meta.start + 4, meta.end):
+            if b.text == b"pitm":
+                version, err = self.read_version(b)
+                if not err:
+                    primary = self.read_uint(2 if version == 0 else 4)
+            elif b.text == b"iinf":
+                for item_id, item_type in self.read_item_infos(b):
+                    items[item_id] = Item(item_id, item_type)
+            elif b.text == b"iref":
+                refs = list(self.read_references(b))
+            elif b.text == b"iprp":
+                for p in self.children(b.start, b.end):
+                    if p.text == b"ipco":
+                        props = self.read_properties(p)
+                    elif p.text == b"ipma":
+                        assoc = self.read_associations(p)
+
+        for item_id, indices in assoc.items():
+            item = items.get(item_id)
+            if not item:
+                continue
+            rotate = 0
+            for i in indices:
+                if 0 < i <= len(props):
+                    text, value = props[i - 1]
+                    if text == b"ispe" and value:
+                        item.width, item.height = value
+                    elif text == b"irot":
+                        rotate = value
+            if rotate & 1 and item.width is not None:
+                item.width, item.height = item.height, item.width
+
+        for ref, from_id, to_ids in refs:
+            if ref == b"dimg":
+                # derived image (grid, overlay) is built of referenced ones
+                for to_id in to_ids:
+                    if to_id in items:
+                        items[to_id].role, items[to_id].ref = "tile", from_id
+            elif ref in REF_ROLES and from_id in items and to_ids:
+                items[from_id].role, items[from_id].ref = REF_ROLES[ref], to_ids[0]
+
+        if primary in items:
+            items[primary].role = "primary"
+        return list(items.values())
+
+    def items(self) -> Tuple[list[Item], str]:
+        """Returns all items of HEIF/AVIF file"""
+        """  meta box is read at once and parsed in memory."""
+        b = self.read_box(0)
+        if not b:
+            return ([], "Empty file")
+        if b.text != b"ftyp":
+            return ([], "No ftyp box")
+
+        m = self.find_box(b"meta", b.end, self.end)
+        if not m:
+            return ([], "meta not found")
+
+        meta = self.load(m)
+        return (meta.meta_items(meta.read_box(0)), None)
+
+    def tracks(self, handlers: tuple = VISUAL_HANDLERS) -> Tuple[list[MovieTrack], str]:
+        """Returns visual tracks of image sequence or video"""
+        """  Every trak box is read at once and parsed in memory."""
+        moov, timescale, err = self.read_moov()
+        if err:
+            return ([], err)
+
+        tracks = []
+        for b in self.children(moov.start, moov.end):
+            if b.text != b"trak":
+                continue
+            trak = self.load(b)
+            track, err = trak.read_track(trak.read_box(0), timescale, handlers)
+            if err:
+                return (tracks, err)
+            if track:
+                tracks.append(track)
+        return (tracks, None)
+
+
+def heif_contents(stream: IO[bytes]) -> Tuple[list[Item], list[MovieTrack], str]:
+    """Returns items and image sequence tracks of HEIF/AVIF file"""
+    p = IFFParser(stream)
+    items, err = p.items()
+    tracks, tracks_err = p.tracks()
+    if items or tracks:
+        err = None
+    return (items, tracks, err or tracks_err)
+
 
 def isobmff_image_size(stream: IO[bytes]) -> ImageSizeResult:
     return IFFParser(stream).image_size()
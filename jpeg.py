@@ -1,45 +1,67 @@
-from typing import IO
+from typing import IO, Tuple
 
 from .types import ImageParser, ImageSize, ImageSizeResult, PreadStream, b2x, be16
 
 jpeg_exts = ("jpeg", "jpg")
 
+APP1 = 0xE1
+SOS = 0xDA
+EXIF = b"Exif\x00\x00"
+
 
 class JpegParser(ImageParser):
     def __init__(self, stream: IO[bytes]):
         self.stream = PreadStream(stream)
 
-    def image_size(self) -> ImageSizeResult:
-        soi = self.stream.read(2)
-        if len(soi) < 2:
-            return (None, "EOF")
-
-        if soi[0] != 0xFF or soi[1] != 0xD8:
-            return (None, f"Wrong SOI {b2x(soi)}")
-
+    def next_segment(self) -> Tuple[int, int, str]:
+        """Returns marker and payload length of next segment"""
+        """  Stream is left at segment payload; marker is None for EOI."""
         while True:
             offs = self.stream.offs
 
             seg = self.stream.read(2)
             if len(seg) < 2:
-                return (None, "EOF")
+                return (0, 0, "EOF")
 
             if seg[0] != 0xFF:
-                return (None, f"Wrong segment header {b2x(seg)} at {offs}")
+                return (0, 0, f"Wrong segment header {b2x(seg)} at {offs}")
 
             if seg[1] >= 0xD0 and seg[1] < 0xD8:  # RSTn; skip
                 continue
 
             if seg[1] == 0xD9:
-                return ((None, "EOI"), None, None)
+                return (None, 0, None)
 
             seg_len = self.stream.read(2)
             if len(seg_len) < 2:
-                return (None, "EOF")
+                return (0, 0, "EOF")
+
+            return (seg[1], be16(seg_len) - 2, None)
+
+    def read_soi(self) -> str:
+        soi = self.stream.read(2)
+        if len(soi) < 2:
+            return "EOF"
+
+        if soi[0] != 0xFF or soi[1] != 0xD8:
+            return f"Wrong SOI {b2x(soi)}"
+
+        return None
 
-            skip = be16(seg_len) - 2
-            # print(f"seg: offs={offs:x}/{offs} {b2x(seg)}{b2x(seg_len)} len={skip}")
-            if seg[1] == 0xC0 or seg[1] == 0xC2:  # SOFn
+    def image_size(self) -> ImageSizeResult:
+        err = self.read_soi()
+        if err:
+            return (None, err)
+
+        while True:
+            marker, skip, err = self.next_segment()
+            if err:
+                return (None, err)
+
+            if marker is None:
+                return (None, "EOI")
+
+            if marker == 0xC0 or marker == 0xC2:  # SOFn
                 data = self.stream.read(5)
                 if len(data) < 5:
                     return (None, "EOF")
@@ -50,6 +72,30 @@ class JpegParser(ImageParser):
 
             self.stream.skip(skip)
 
+    def exif_offset(self) -> Tuple[int, str]:
+        """Returns offset of TIFF header in EXIF APP1 segment"""
+        err = self.read_soi()
+        if err:
+            return (0, err)
+
+        while True:
+            marker, skip, err = self.next_segment()
+            if err:
+                return (0, err)
+
+            # EXIF goes right after SOI; give up once image data starts
+            if marker is None or marker == SOS:
+                return (0, "EXIF not found")
+
+            if marker == APP1 and skip > len(EXIF):
+                offs = self.stream.offs
+                if self.stream.read(len(EXIF)) == EXIF:
+                    return (offs + len(EXIF), None)
+
+                self.stream.seek(offs)
+
+            self.stream.skip(skip)
+
 
 def jpeg_image_size(stream: IO[bytes]) -> ImageSizeResult:
     return JpegParser(stream).image_size()
@@ -1,15 +1,13 @@
 from typing import IO
 
 from .isobmff import BoxParser
+from .magic import JXL_SIGNATURE, JXL_SOI
 from .types import ImageParser, ImageSize, ImageSizeResult, b2x
 
 jpegxl_exts = ("jxl",)
 
 RATIO = (None, (1, 1), (12, 10), (4, 3), (3, 2), (16, 9), (5, 4), (2, 1))
-SOI = b"\xFF\x0A"
-JXLBOX = (
-    b"\x00\x00\x00\x0cJXL \r\n\x87\n" b"\x00\x00\x00\x14ftypjxl \x00\x00\x00\x00jxl "
-)
+JXLBOX = JXL_SIGNATURE + b"\x00\x00\x00\x14ftypjxl \x00\x00\x00\x00jxl "
 
 
 def get_bits(bits: int, n: int) -> tuple[int, int]:
@@ -33,7 +31,7 @@ class JpegxlParser(ImageParser, BoxParser):
             return None, "EOF"
 
         soi, data = data[:2], data[2:]
-        if soi != SOI:
+        if soi != JXL_SOI:
             return None, f"Wrong SOI {b2x(soi)}"
 
         bits = int.from_bytes(data, "little")
@@ -53,7 +51,7 @@ class JpegxlParser(ImageParser, BoxParser):
         if len(data) < 11:
             return None, "Empty file"
 
-        if data[:2] == SOI:
+        if data[:2] == JXL_SOI:
             # raw code stream
             return JpegxlParser.parse_codestream(data)
 
@@ -0,0 +1,58 @@
+from struct import Struct
+from typing import IO
+
+from .magic import KTX1, KTX2
+from .types import ImageParser, ImageSizeResult, PreadStream, TextureSize, b2x
+
+ktx_exts = ("ktx", "ktx2")
+
+# https://registry.khronos.org/KTX/specs/1.0/ktxspec.v1.html
+# https://registry.khronos.org/KTX/specs/2.0/ktxspec.v2.html
+ENDIANNESS = 0x04030201
+KTX1HDR = "20x7I"
+KTX2HDR = Struct("<12s4x4x6I")
+
+
+class KtxParser(ImageParser):
+    def __init__(self, stream: IO[bytes]):
+        self.stream = PreadStream(stream)
+
+    def ktx1_size(self, data: bytes) -> ImageSizeResult:
+        order = data[12:16]
+        if int.from_bytes(order, "little") == ENDIANNESS:
+            hdr = Struct("<" + KTX1HDR)
+        elif int.from_bytes(order, "big") == ENDIANNESS:
+            hdr = Struct(">" + KTX1HDR)
+        else:
+            return (None, f"Invalid KTX endianness {b2x(order)}")
+
+        if len(data) < 16 + hdr.size:
+            return (None, "EOF")
+
+        w, h, depth, layers, faces, mips, _ = hdr.unpack(data[16 : 16 + hdr.size])
+        # zero means "not an array", "not 3D", "generate mipmaps" respectively
+        return (TextureSize(w, h or 1, depth or 1, mips or 1, layers or 1, faces), None)
+
+    def ktx2_size(self, data: bytes) -> ImageSizeResult:
+        if len(data) < KTX2HDR.size:
+            return (None, "EOF")
+
+        _, w, h, depth, layers, faces, mips = KTX2HDR.unpack(data[: KTX2HDR.size])
+        return (TextureSize(w, h or 1, depth or 1, mips or 1, layers or 1, faces), None)
+
+    def image_size(self) -> ImageSizeResult:
+        data = self.stream.pread(0, 64)
+        if len(data) < 16:
+            return (None, "EOF")
+
+        sig = data[:12]
+        if sig == KTX1:
+            return self.ktx1_size(data)
+        if sig == KTX2:
+            return self.ktx2_size(data)
+
+        return (None, f"Wrong KTX signature {b2x(sig)}")
+
+
+def ktx_image_size(stream: IO[bytes]) -> ImageSizeResult:
+    return KtxParser(stream).image_size()
@@ -1,59 +1,162 @@
+import sys
+from importlib import import_module
 from typing import IO, Tuple
 
-from .bmp import OS2IDS, WINIDS, BmpParser
-from .gif import GifParser
-from .isobmff import IFFParser
-from .jpeg import JpegParser
-from .jpegxl import JXLBOX, JpegxlParser
-from .png import PngParser
-from .tiff import TiffParser
-from .types import ImageParser, ImageSizeResult
-from .webp import WebpParser
+from .types import ForwardStream, ImageParser, ImageSizeResult, StreamWindowError
+
+# Format modules are imported only when data of that format is seen.
+# module: (parser class, extension tuple names...)
+FORMATS = {
+    "bmp": ("BmpParser", "bmp_exts"),
+    "dds": ("DdsParser", "dds_exts"),
+    "gif": ("GifParser", "gif_exts"),
+    "isobmff": ("IFFParser", "iso_exts", "mov_exts"),
+    "jpeg": ("JpegParser", "jpeg_exts"),
+    "jpegxl": ("JpegxlParser", "jpegxl_exts"),
+    "ktx": ("KtxParser", "ktx_exts"),
+    "png": ("PngParser", "png_exts"),
+    "psd": ("PsdParser", "psd_exts"),
+    "qoi": ("QoiParser", "qoi_exts"),
+    "tga": ("TgaParser", "tga_exts"),
+    "tiff": ("TiffParser", "tiff_exts"),
+    "webp": ("WebpParser", "webp_exts"),
+}
+
+# Signatures, also used by format modules and batch classification
+BMP_WINIDS = (b"BM",)
+BMP_OS2IDS = (b"BA", b"CI", b"CP", b"IC", b"PT")
+DDS = b"DDS "
+JXL_SIGNATURE = b"\x00\x00\x00\x0cJXL \r\n\x87\n"  # container signature box
+JXL_SOI = b"\xff\x0a"  # raw codestream
+# https://registry.khronos.org/KTX/specs/1.0/ktxspec.v1.html
+KTX1 = b"\xabKTX 11\xbb\r\n\x1a\n"
+# https://registry.khronos.org/KTX/specs/2.0/ktxspec.v2.html
+KTX2 = b"\xabKTX 20\xbb\r\n\x1a\n"
+KTXIDS = (KTX1, KTX2)
+PNG = b"\x89PNG\x0d\x0a\x1a\x0a"
+PSD = b"8BPS"
+QOI = b"qoif"
+# Top-level atoms which QuickTime files may start with instead of ftyp
+QTBOXES = (b"moov", b"wide", b"mdat", b"free", b"skip")
+TGA_FOOTER = b"TRUEVISION-XFILE.\x00"
+TGA_FOOTER_SIZE = 26
+
+# Leading signatures in match order: (module, ((offset, bytes), ...)),
+# every part has to match. First part is always at offset 0.
+SIGNATURES = (
+    ("jpegxl", ((0, JXL_SIGNATURE),)),
+    *(("isobmff", ((0, b"\x00"), (4, box))) for box in (b"ftyp",) + QTBOXES),
+    ("jpeg", ((0, b"\xff\xd8"),)),
+    ("jpegxl", ((0, JXL_SOI),)),
+    ("png", ((0, PNG),)),
+    ("tiff", ((0, b"II*\x00"),)),
+    ("tiff", ((0, b"MM\x00*"),)),
+    ("webp", ((0, b"RIFF"), (8, b"WEBP"))),
+    ("gif", ((0, b"GIF"),)),
+    ("dds", ((0, DDS),)),
+    *(("ktx", ((0, sig),)) for sig in KTXIDS),
+    ("psd", ((0, PSD),)),
+    ("qoi", ((0, QOI),)),
+    *(("bmp", ((0, sig),)) for sig in BMP_WINIDS + BMP_OS2IDS),
+)
+
+
+def by_first_byte(signatures: tuple) -> dict[int, list]:
+    index = {}
+    for module, parts in signatures:
+        index.setdefault(parts[0][1][0], []).append((module, parts))
+    return index
+
+
+# parse_bytes() tries only signatures starting with the first data byte
+FIRST_BYTE = by_first_byte(SIGNATURES)
+
+
+def parser(module: str) -> ImageParser:
+    """Returns parser class of format module, importing it on first use"""
+    return getattr(import_module("." + module, __package__), FORMATS[module][0])
+
+
+def __getattr__(name: str):
+    # image_exts needs all format modules, so it is built on first access
+    if name == "image_exts":
+        exts = frozenset(
+            e
+            for module, (_, *attrs) in FORMATS.items()
+            for attr in attrs
+            for e in getattr(import_module("." + module, __package__), attr)
+        )
+        globals()[name] = exts
+        return exts
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def parse_bytes(data: bytes) -> Tuple[ImageParser, str]:
     if len(data) < 12:
         return None, f"Data length {len(data)} is too short"
 
-    if data[0] == 0:
-        if data[:12] == JXLBOX[:12]:
-            return JpegxlParser, None
-        if data[4:8] == b"ftyp":
-            return IFFParser, None
+    for module, parts in FIRST_BYTE.get(data[0], ()):
+        if all(data.startswith(sig, offs) for offs, sig in parts):
+            return parser(module), None
 
-    elif data[0] == 0xFF:
-        if data[1] == 0xD8:
-            return JpegParser, None
-        if data[1] == 0x0A:
-            return JpegxlParser, None
-
-    elif data[:4] == b"\x89PNG":
-        return PngParser, None
-
-    elif data[:4] == b"II*\x00" or data[:4] == b"MM\x00*":
-        return TiffParser, None
+    return None, "Unknown file"
 
-    elif data[:4] == b"RIFF" and data[8:12] == b"WEBP":
-        return WebpParser, None
 
-    elif data[:3] == b"GIF":
-        return GifParser, None
+def parse_footer(stream: IO[bytes]) -> Tuple[ImageParser, str]:
+    end = stream.seek(0, 2)
+    if end < TGA_FOOTER_SIZE:
+        return None, "Unknown file"
 
-    elif data[:2] in WINIDS + OS2IDS:
-        return BmpParser, None
+    stream.seek(end - TGA_FOOTER_SIZE)
+    if stream.read(TGA_FOOTER_SIZE).endswith(TGA_FOOTER):
+        return parser("tga"), None
 
     return None, "Unknown file"
 
 
-def parse_stream(stream: IO[bytes]) -> Tuple[ImageParser, str]:
+def parse_stream(stream: IO[bytes], footer: bool = True) -> Tuple[ImageParser, str]:
+    """Detects format from leading signature, then from footer if enabled"""
     stream.seek(0)
     data = stream.read(12)
-    return parse_bytes(data)
-
-
-def image_stream_size(stream: IO[bytes]) -> ImageSizeResult:
-    cls, err = parse_stream(stream)
-    if err:
-        return None, err
-
-    return cls(stream).image_size()
+    cls, err = parse_bytes(data)
+    if cls or len(data) < 12 or not footer:
+        return cls, err
+
+    # formats without leading signature
+    return parse_footer(stream)
+
+
+def image_stream_size(stream: IO[bytes], footer: bool = True) -> ImageSizeResult:
+    """Returns image size; non-seekable streams are read forward only"""
+    """  footer=False skips TGA footer probe, which reads the stream to its
+    end, e.g. for compressed archive members."""
+    seekable = getattr(stream, "seekable", None)
+    if seekable and not seekable():
+        stream = ForwardStream(stream)
+
+    try:
+        cls, err = parse_stream(stream, footer)
+        if err:
+            return None, err
+
+        return cls(stream).image_size()
+    except StreamWindowError as e:
+        return None, str(e)
+
+
+def main(argv: list[str]) -> int:
+    """Prints sizes of image files, "-" reads stdin"""
+    failed = 0
+    for path in argv:
+        if path == "-":
+            size, err = image_stream_size(sys.stdin.buffer)
+        else:
+            with open(path, "rb") as f:
+                size, err = image_stream_size(f)
+        print(f"{path}: {err or size}")
+        failed += bool(err)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,11 +1,11 @@
 from struct import Struct
 from typing import IO
 
+from .magic import PNG
 from .types import ImageParser, ImageSize, ImageSizeResult, PreadStream, b2x
 
 CHUNK = Struct(">I4s")
 IHDR = Struct(">IIBBBBB")
-PNG = b"\x89PNG\x0D\x0A\x1A\x0A"
 
 
 png_exts = ("png",)
@@ -0,0 +1,54 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Tuple
+
+from .magic import image_stream_size
+from .types import FdStream, ImageSizeResult
+
+PathResult = Tuple[str, ImageSizeResult]
+
+INFLIGHT = 4  # queued jobs per worker thread
+
+
+def image_fd_size(fd: int) -> ImageSizeResult:
+    """Returns image size of opened file; safe to call concurrently on same fd"""
+    return image_stream_size(FdStream(fd))
+
+
+def image_path_size(path: str) -> ImageSizeResult:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError as e:
+        return (None, str(e))
+    try:
+        return image_fd_size(fd)
+    finally:
+        os.close(fd)
+
+
+def path_result(path: str) -> PathResult:
+    return path, image_path_size(path)
+
+
+def image_sizes(paths: Iterable[str], workers: int = None) -> Iterator[PathResult]:
+    """Yields (path, image size result) for given paths using thread pool
+
+    os.pread() releases the GIL, so header reads of different files overlap.
+    Results are yielded in the order of paths. At most INFLIGHT jobs per
+    worker are queued, so lazy paths iterables are consumed as they go."""
+    # same default as ThreadPoolExecutor
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)
+    with ThreadPoolExecutor(workers) as pool:
+        limit = workers * INFLIGHT
+        jobs = deque()
+        try:
+            for path in paths:
+                if len(jobs) >= limit:
+                    yield jobs.popleft().result()
+                jobs.append(pool.submit(path_result, path))
+            while jobs:
+                yield jobs.popleft().result()
+        finally:
+            for job in jobs:
+                job.cancel()
@@ -0,0 +1,34 @@
+from struct import Struct
+from typing import IO
+
+from .magic import PSD
+from .types import ImageParser, ImageSize, ImageSizeResult, PreadStream, b2x
+
+psd_exts = ("psd", "psb")
+
+# https://www.adobe.com/devnet-apps/photoshop/fileformatashtml/
+HEADER = Struct(">4sH6xHIIHH")
+
+
+class PsdParser(ImageParser):
+    def __init__(self, stream: IO[bytes]):
+        self.stream = PreadStream(stream)
+
+    def image_size(self) -> ImageSizeResult:
+        data = self.stream.pread(0, HEADER.size)
+        if len(data) < HEADER.size:
+            return (None, "EOF")
+
+        sig, version, _, h, w, _, _ = HEADER.unpack(data)
+        if sig != PSD:
+            return (None, f"Wrong PSD signature {b2x(sig)}")
+
+        # version 1 is PSD, version 2 is PSB (large document format)
+        if version not in (1, 2):
+            return (None, f"Unknown PSD version {version}")
+
+        return (ImageSize(w, h), None)
+
+
+def psd_image_size(stream: IO[bytes]) -> ImageSizeResult:
+    return PsdParser(stream).image_size()
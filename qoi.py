@@ -0,0 +1,33 @@
+from struct import Struct
+from typing import IO
+
+from .magic import QOI
+from .types import ImageParser, ImageSize, ImageSizeResult, PreadStream, b2x
+
+qoi_exts = ("qoi",)
+
+# https://qoiformat.org/qoi-specification.pdf
+HEADER = Struct(">4sIIBB")
+
+
+class QoiParser(ImageParser):
+    def __init__(self, stream: IO[bytes]):
+        self.stream = PreadStream(stream)
+
+    def image_size(self) -> ImageSizeResult:
+        data = self.stream.pread(0, HEADER.size)
+        if len(data) < HEADER.size:
+            return (None, "EOF")
+
+        sig, w, h, channels, _ = HEADER.unpack(data)
+        if sig != QOI:
+            return (None, f"Wrong QOI signature {b2x(sig)}")
+
+        if channels not in (3, 4):
+            return (None, f"Invalid QOI channels {channels}")
+
+        return (ImageSize(w, h), None)
+
+
+def qoi_image_size(stream: IO[bytes]) -> ImageSizeResult:
+    return QoiParser(stream).image_size()
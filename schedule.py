@@ -0,0 +1,141 @@
+import os
+from collections import deque
+from fcntl import ioctl
+from struct import Struct
+from typing import Iterable, Iterator, Tuple, Union
+
+from .files import lowerext
+from .pool import PathResult, image_fd_size
+
+Entry = Union[str, os.DirEntry]
+
+# Bytes at the beginning of file which are enough for the parser.
+# Formats which walk segments or boxes get a larger window.
+HEADER_WINDOWS = {
+    "bmp": 26,
+    "dib": 26,
+    "gif": 10,
+    "png": 33,
+    "psd": 26,
+    "psb": 26,
+    "qoi": 14,
+    "dds": 148,
+    "ktx": 64,
+    "ktx2": 64,
+    "webp": 30,
+    "jxl": 4096,
+    "tga": 18,
+}
+DEFAULT_WINDOW = 65536
+# Formats identified by trailer
+FOOTER_WINDOWS = {
+    "tga": 26,
+}
+
+# linux/fiemap.h
+FS_IOC_FIEMAP = 0xC020660B
+FIEMAP = Struct("=QQIIII")
+FIEMAP_EXTENT = Struct("=QQQ16xI12x")
+
+
+def physical_offset(path: str) -> int:
+    """Returns physical offset of the first extent of file, or -1"""
+    buf = bytearray(FIEMAP.pack(0, 2**64 - 1, 0, 0, 1, 0) + bytes(FIEMAP_EXTENT.size))
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return -1
+    try:
+        ioctl(fd, FS_IOC_FIEMAP, buf)
+    except OSError:
+        return -1
+    finally:
+        os.close(fd)
+    if not FIEMAP.unpack_from(buf)[3]:
+        return -1
+    return FIEMAP_EXTENT.unpack_from(buf, FIEMAP.size)[1]
+
+
+def inode(e: Entry) -> int:
+    if isinstance(e, os.DirEntry):
+        # cached from readdir() on POSIX systems
+        return e.inode()
+    try:
+        return os.stat(e).st_ino
+    except OSError:
+        return 0
+
+
+def disk_order(entries: Iterable[Entry], physical: bool = False) -> list[str]:
+    """Returns paths sorted by inode or by physical offset of file data"""
+    if physical:
+        keys = [
+            (physical_offset(os.fspath(e)), inode(e), os.fspath(e)) for e in entries
+        ]
+    else:
+        keys = [(0, inode(e), os.fspath(e)) for e in entries]
+    keys.sort()
+    return [k[2] for k in keys]
+
+
+def advise(fd: int, path: str) -> None:
+    """Disable readahead and request only header (and footer) of file"""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    ext = lowerext(path)
+    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_RANDOM)
+    os.posix_fadvise(
+        fd, 0, HEADER_WINDOWS.get(ext, DEFAULT_WINDOW), os.POSIX_FADV_WILLNEED
+    )
+    footer = FOOTER_WINDOWS.get(ext)
+    if footer:
+        end = os.fstat(fd).st_size
+        os.posix_fadvise(fd, max(end - footer, 0), footer, os.POSIX_FADV_WILLNEED)
+
+
+def prefetch(path: str) -> Tuple[str, int, str]:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError as e:
+        return path, -1, str(e)
+    try:
+        advise(fd, path)
+    except OSError:
+        # hints are optional, e.g. not supported by file system
+        pass
+    return path, fd, None
+
+
+def scheduled_image_sizes(
+    entries: Iterable[Entry], depth: int = 32, physical: bool = False
+) -> Iterator[PathResult]:
+    """Yields (path, image size result) in disk order
+
+    Up to depth files ahead of the parser are opened and their header
+    windows are requested from kernel, so reads of the queue overlap."""
+    paths = iter(disk_order(entries, physical))
+    queue = deque()
+    for path in paths:
+        queue.append(prefetch(path))
+        if len(queue) >= depth:
+            break
+
+    try:
+        while queue:
+            path, fd, err = queue.popleft()
+            path_next = next(paths, None)
+            if path_next is not None:
+                queue.append(prefetch(path_next))
+
+            if err:
+                yield path, (None, err)
+                continue
+            try:
+                yield path, image_fd_size(fd)
+            finally:
+                os.close(fd)
+    finally:
+        # generator closed early or parser raised: close prefetched files
+        for _, fd, err in queue:
+            if not err:
+                os.close(fd)
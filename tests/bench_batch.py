@@ -0,0 +1,96 @@
+import os
+import random
+import sys
+from io import BytesIO
+from time import perf_counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kstools.batch import (  # noqa: E402
+    CODE,
+    PREFIX_SIZE,
+    classify,
+    classify_python,
+    code_name,
+)
+from kstools.magic import parse_bytes  # noqa: E402
+
+
+def le(v: int, n: int) -> bytes:
+    return v.to_bytes(n, "little")
+
+
+def be(v: int, n: int) -> bytes:
+    return v.to_bytes(n, "big")
+
+
+def gen_prefix() -> bytes:
+    w, h = random.randint(1, 16383), random.randint(1, 16383)
+    kind = random.randrange(9)
+    if kind == 0:
+        d = b"\x89PNG\r\n\x1a\n" + be(13, 4) + b"IHDR" + be(w, 4) + be(h, 4)
+    elif kind == 1:
+        d = b"GIF89a" + le(w, 2) + le(h, 2)
+    elif kind == 2:
+        d = b"BM" + bytes(12) + le(40, 4) + le(w, 4) + le(h, 4)
+    elif kind == 3:
+        d = b"RIFF" + le(1000, 4) + b"WEBPVP8X" + le(10, 4) + bytes(4)
+        d += le(w - 1, 3) + le(h - 1, 3)
+    elif kind == 4:
+        d = b"RIFF" + le(1000, 4) + b"WEBPVP8 " + le(1000, 4) + bytes(3)
+        d += b"\x9d\x01\x2a" + le(w, 2) + le(h, 2)
+    elif kind == 5:
+        # raw JPEG XL codestream with random SizeHeader bits
+        d = b"\xff\x0a" + random.randbytes(12)
+    elif kind == 6:
+        d = b"\xff\xd8\xff\xe0" + random.randbytes(12)
+    elif kind == 7:
+        d = bytes(3) + b"\x18ftypheic" + random.randbytes(8)
+    else:
+        d = random.randbytes(PREFIX_SIZE)
+    return (d + random.randbytes(PREFIX_SIZE))[:PREFIX_SIZE]
+
+
+def classify_loop(buf: bytes, width: int = PREFIX_SIZE) -> tuple:
+    """Per item magic.parse_bytes() and parser on prefix"""
+    codes, widths, heights = [], [], []
+    for i in range(0, len(buf), width):
+        data = buf[i : i + width]
+        cls, _ = parse_bytes(data)
+        code = CODE[cls.__module__.rsplit(".", 1)[1]] if cls else 0
+        w = h = 0
+        if code_name(code) in ("png", "gif", "bmp", "webp", "jpegxl"):
+            size, err = cls(BytesIO(data)).image_size()
+            if not err:
+                w, h = size.width, size.height
+        codes.append(code)
+        widths.append(w)
+        heights.append(h)
+    return codes, widths, heights
+
+
+def timed(name: str, f, buf: bytes) -> tuple:
+    t = perf_counter()
+    r = f(buf)
+    t = perf_counter() - t
+    n = len(buf) // PREFIX_SIZE
+    print(f"{name:8} {t * 1e3:9.1f}ms {n / t / 1e6:7.2f}M prefixes/s")
+    return tuple(list(x) for x in r)
+
+
+def bench(count: int = 200000) -> None:
+    random.seed(1)
+    buf = b"".join(gen_prefix() for _ in range(count))
+    expected = timed("loop", classify_loop, buf)
+    assert timed("python", classify_python, buf) == expected
+    classify(buf[:PREFIX_SIZE])  # import numpy before timing
+    result = timed("classify", classify, buf)
+    assert result == expected
+    stats = {}
+    for c in result[0]:
+        stats[code_name(c)] = stats.get(code_name(c), 0) + 1
+    print(stats)
+
+
+if __name__ == "__main__":
+    bench(*map(int, sys.argv[1:]))
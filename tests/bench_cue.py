@@ -0,0 +1,57 @@
+import os
+import random
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kstools.cue import Cue  # noqa: E402
+
+
+def gen_cue(rnd: random.Random, tracks: int) -> bytes:
+    lines = [
+        'REM GENRE "Rock"',
+        "REM DATE 1999",
+        "REM DISCID 8A0B5C0C",
+        'REM COMMENT "ExactAudioCopy v1.0b3"',
+        "CATALOG 0724384960650",
+        f'PERFORMER "Artist {rnd.randrange(1000)}"',
+        f'TITLE "Album {rnd.randrange(1000)}"',
+        'FILE "album.wav" WAVE',
+    ]
+    m = 0
+    for i in range(1, tracks + 1):
+        lines.append(f"  TRACK {i:02d} AUDIO")
+        lines.append(f'    TITLE "Song {i}"')
+        lines.append(f'    PERFORMER "Artist {i}"')
+        lines.append("    REM COMPOSER Someone")
+        lines.append(f"    ISRC USABC99{i:05d}")
+        if i > 1:
+            lines.append(f"    INDEX 00 {m:02d}:00:00")
+            m += 1
+        lines.append(f"    INDEX 01 {m:02d}:{rnd.randrange(60):02d}:00")
+        m += rnd.randrange(1, 5)
+    return "\r\n".join(lines).encode("ascii")
+
+
+def bench(count: int = 10000, seed: int = 1) -> None:
+    rnd = random.Random(seed)
+    corpus = [gen_cue(rnd, rnd.randrange(5, 30)) for _ in range(count)]
+    lines = sum(c.count(b"\n") + 1 for c in corpus)
+
+    t = perf_counter()
+    cues = [Cue(f"{i}.cue", data) for i, data in enumerate(corpus)]
+    parse = perf_counter() - t
+
+    t = perf_counter()
+    for c in cues:
+        c.build()
+    build = perf_counter() - t
+
+    invalid = sum(not c.valid for c in cues)
+    print(f"files={count} lines={lines} invalid={invalid}")
+    print(f"parse={parse:.03f}s ({lines / parse:.0f} lines/s) build={build:.03f}s")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
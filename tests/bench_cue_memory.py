@@ -0,0 +1,50 @@
+import os
+import sys
+import tracemalloc
+from time import perf_counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kstools.cue import Cue  # noqa: E402
+
+TRACKS_PER_CUE = 16
+
+
+def gen_cue(n: int) -> bytes:
+    lines = [
+        'REM GENRE "Rock"',
+        f"REM DATE {1970 + n % 50}",
+        f'PERFORMER "Artist {n}"',
+        f'TITLE "Album {n}"',
+        'FILE "album.flac" WAVE',
+    ]
+    for i in range(1, TRACKS_PER_CUE + 1):
+        lines.append(f"  TRACK {i:02d} AUDIO")
+        lines.append(f'    TITLE "Song {n}/{i}"')
+        lines.append(f"    REM COMPOSER Composer{i}")
+        lines.append(f"    ISRC USABC{n % 100:02d}{i:05d}")
+        if i > 1:
+            lines.append(f"    INDEX 00 {i * 4 - 1:02d}:58:00")
+        lines.append(f"    INDEX 01 {i * 4:02d}:00:00")
+    return "\n".join(lines).encode("ascii")
+
+
+def bench(tracks: int = 1000000) -> None:
+    count = tracks // TRACKS_PER_CUE
+    tracemalloc.start()
+    t = perf_counter()
+    catalog = [Cue(f"{n}.cue", gen_cue(n)) for n in range(count)]
+    elapsed = perf_counter() - t
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tracks = sum(len(c.tracks) for c in catalog)
+    print(f"cues={len(catalog)} tracks={tracks} parse={elapsed:.02f}s")
+    print(
+        f"memory={size / 2**20:.01f}MiB peak={peak / 2**20:.01f}MiB"
+        f" ({size / tracks:.0f} bytes/track)"
+    )
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,101 @@
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from statistics import quantiles
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+from kstools.client import ImageSizeClient  # noqa: E402
+
+# minimal headers of stand-in images
+HEADERS = {
+    "png": lambda w, h: b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+    + w.to_bytes(4, "big")
+    + h.to_bytes(4, "big")
+    + b"\x08\x02\x00\x00\x00",
+    "gif": lambda w, h: b"GIF89a"
+    + w.to_bytes(2, "little")
+    + h.to_bytes(2, "little")
+    + bytes(3),
+    "bmp": lambda w, h: b"BM"
+    + bytes(12)
+    + (40).to_bytes(4, "little")
+    + w.to_bytes(4, "little")
+    + h.to_bytes(4, "little")
+    + bytes(28),
+}
+
+
+def gen_files(root: str, count: int) -> list[str]:
+    paths = []
+    for i in range(count):
+        ext = random.choice(list(HEADERS))
+        path = os.path.join(root, f"{i}.{ext}")
+        with open(path, "wb") as f:
+            f.write(HEADERS[ext](random.randint(1, 8000), random.randint(1, 8000)))
+        paths.append(path)
+    return paths
+
+
+def start_daemon(sock: str) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    cmd = [sys.executable, "-m", "kstools.daemon", sock]
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env)
+    for _ in range(500):
+        if os.path.exists(sock):
+            return proc
+        time.sleep(0.01)
+    proc.kill()
+    raise RuntimeError("daemon did not start")
+
+
+def client_run(sock: str, requests: list[list[str]]) -> list[float]:
+    """Returns latencies of requests in seconds"""
+    latencies = []
+    with ImageSizeClient(sock) as client:
+        for request in requests:
+            t = time.perf_counter()
+            results = client.sizes(request)
+            latencies.append(time.perf_counter() - t)
+            assert all("width" in r for r in results), results
+    return latencies
+
+
+def report(name: str, latencies: list[float]) -> None:
+    q = quantiles(latencies, n=100)
+    print(
+        f"{name:10} requests={len(latencies):6}"
+        f" p50={q[49] * 1e6:8.0f}us p99={q[98] * 1e6:8.0f}us"
+    )
+
+
+def bench(files: int = 2000, clients: int = 8, requests: int = 1000) -> None:
+    with tempfile.TemporaryDirectory() as root:
+        paths = gen_files(root, files)
+        sock = os.path.join(root, "kstools.sock")
+        proc = start_daemon(sock)
+        try:
+            # every file is requested once, then results come from cache
+            cold = [[[p] for p in paths[i::clients]] for i in range(clients)]
+            runs = {"cold": cold}
+            for name, batch in (("single", 1), ("batch16", 16)):
+                runs[name] = [
+                    [random.sample(paths, batch) for _ in range(requests)]
+                    for _ in range(clients)
+                ]
+            with ThreadPoolExecutor(clients) as pool:
+                for name, requests in runs.items():
+                    latencies = pool.map(client_run, [sock] * clients, requests)
+                    report(name, [t for run in latencies for t in run])
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    bench(*map(int, sys.argv[1:]))
@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# 1x1 PNG header
+PNG = (
+    b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+    b"\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00"
+)
+
+LOOKUP = """
+import sys
+from time import perf_counter
+
+t = perf_counter()
+from kstools.magic import image_stream_size
+
+with open(sys.argv[1], "rb") as f:
+    image_stream_size(f)
+t = perf_counter() - t
+print(int(t * 1e6), *sorted(m for m in sys.modules if m.startswith("kstools")))
+"""
+
+
+def lookup(path: str) -> Tuple[int, list[str], list[str]]:
+    """Runs single image size lookup in new interpreter"""
+    """  Returns import and lookup time in us, loaded kstools modules
+    and -X importtime lines of kstools modules"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    cmd = [sys.executable, "-X", "importtime", "-c", LOOKUP, path]
+    out = subprocess.run(
+        cmd, cwd=ROOT, env=env, capture_output=True, check=True, text=True
+    )
+    us, *modules = out.stdout.split()
+    lines = [line for line in out.stderr.splitlines() if "kstools" in line]
+    return int(us), modules, lines
+
+
+def bench(budget_ms: float = 40.0, runs: int = 5) -> bool:
+    with tempfile.NamedTemporaryFile(suffix=".png") as f:
+        f.write(PNG)
+        f.flush()
+        samples = [lookup(f.name) for _ in range(runs)]
+
+    best, modules, lines = min(samples)
+    print("\n".join(lines))
+    print(f"modules: {' '.join(modules)}")
+    print(f"lookup={best / 1000:.02f}ms (best of {runs}) budget={budget_ms:.02f}ms")
+
+    ok = True
+    unexpected = set(modules) - {
+        "kstools",
+        "kstools.magic",
+        "kstools.types",
+        "kstools.png",
+    }
+    if unexpected:
+        print(f"unexpected modules: {' '.join(sorted(unexpected))}")
+        ok = False
+    if best > budget_ms * 1000:
+        print("import time budget exceeded")
+        ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if bench(float(sys.argv[1]) if len(sys.argv) > 1 else 40.0) else 1)
@@ -0,0 +1,82 @@
+import io
+import os
+import sys
+import tarfile
+import zipfile
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kstools.archive import (  # noqa: E402
+    INFLATE_WINDOW,
+    InflateStream,
+    archive_image_sizes,
+    zip_member_stream,
+)
+
+
+def tga(w: int, h: int) -> bytes:
+    """TGA found only by footer, larger than inflate window"""
+    header = bytes([0, 0, 2]) + bytes(9) + w.to_bytes(2, "little")
+    header += h.to_bytes(2, "little") + bytes([24, 0])
+    pixels = bytes(range(256)) * (2 * INFLATE_WINDOW // 256)
+    return header + pixels + bytes(8) + b"TRUEVISION-XFILE.\x00"
+
+
+def sizes(data: bytes) -> dict:
+    results = archive_image_sizes(io.BytesIO(data))
+    return {name: (r[0].width, r[0].height) if r[0] else r[1] for name, r in results}
+
+
+def test_inflate_window():
+    data = tga(5, 6)
+    stream = io.BytesIO(zip_bytes(data))
+    info = zipfile.ZipFile(stream).getinfo("big.tga")
+    s, err = zip_member_stream(stream, info)
+    assert isinstance(s, InflateStream) and err is None
+
+    assert s.read(18) == data[:18]
+    s.seek(-26, 2)
+    assert s.read() == data[-26:]
+    # only the window is kept while skipping to the end
+    assert len(s.data) <= INFLATE_WINDOW and s.start > 0
+
+    # reading before the window restarts decompression
+    s.seek(1000)
+    assert s.read(100) == data[1000:1100]
+    assert s.start == 0
+
+
+def zip_bytes(data: bytes) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        z.writestr("big.tga", data, zipfile.ZIP_DEFLATED)
+        z.writestr("stored.TGA", data, zipfile.ZIP_STORED)
+        z.writestr("big.bin", data, zipfile.ZIP_DEFLATED)
+    return buf.getvalue()
+
+
+def test_zip():
+    assert sizes(zip_bytes(tga(5, 6))) == {
+        "big.tga": (5, 6),
+        "stored.TGA": (5, 6),
+        # footer of compressed members is probed only for TGA names
+        "big.bin": "Unknown file",
+    }
+
+
+@pytest.mark.parametrize("mode", ["w", "w:gz"])
+def test_tar(mode):
+    data = tga(7, 8)
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode=mode) as t:
+        for name in ("a.tga", "b.bin"):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            t.addfile(info, io.BytesIO(data))
+
+    expected = {"a.tga": (7, 8), "b.bin": (7, 8)}
+    if mode != "w":
+        expected["b.bin"] = "Unknown file"
+    assert sizes(buf.getvalue()) == expected
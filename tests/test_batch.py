@@ -0,0 +1,79 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kstools.batch import (  # noqa: E402
+    CODE,
+    PREFIX_SIZE,
+    classify_numpy,
+    classify_python,
+)
+
+
+def le(v: int, n: int) -> bytes:
+    return v.to_bytes(n, "little")
+
+
+def be(v: int, n: int) -> bytes:
+    return v.to_bytes(n, "big")
+
+
+def prefixes(rng: random.Random, count: int) -> bytes:
+    """Packed prefixes of every classified kind, random sizes and noise"""
+    out = []
+    for i in range(count):
+        w, h = rng.randint(1, 16383), rng.randint(1, 16383)
+        kind = i % 9
+        if kind == 0:
+            d = b"\x89PNG\r\n\x1a\n" + be(13, 4) + b"IHDR" + be(w, 4) + be(h, 4)
+        elif kind == 1:
+            d = b"GIF89a" + le(w, 2) + le(h, 2)
+        elif kind == 2:
+            d = b"BM" + bytes(12) + le(40, 4) + le(w, 4) + le(h, 4)
+        elif kind == 3:
+            d = b"RIFF" + le(1000, 4) + b"WEBPVP8X" + le(10, 4) + bytes(4)
+            d += le(w - 1, 3) + le(h - 1, 3)
+        elif kind == 4:
+            d = b"RIFF" + le(1000, 4) + b"WEBPVP8 " + le(1000, 4) + bytes(3)
+            d += b"\x9d\x01\x2a" + le(w, 2) + le(h, 2)
+        elif kind == 5:
+            d = b"\xff\x0a" + rng.randbytes(12)
+        elif kind == 6:
+            d = b"\xff\xd8\xff\xe0" + rng.randbytes(12)
+        elif kind == 7:
+            d = bytes(3) + b"\x18ftypheic" + rng.randbytes(8)
+        else:
+            d = rng.randbytes(PREFIX_SIZE)
+        out.append((d + rng.randbytes(PREFIX_SIZE))[:PREFIX_SIZE])
+    return b"".join(out)
+
+
+def test_classify_python():
+    buf = b"".join(
+        (d + bytes(PREFIX_SIZE))[:PREFIX_SIZE]
+        for d in (
+            b"\x89PNG\r\n\x1a\n" + be(13, 4) + b"IHDR" + be(640, 4) + be(480, 4),
+            b"GIF89a" + le(32, 2) + le(16, 2),
+            b"\xff\xd8\xff\xe0",
+            bytes(PREFIX_SIZE),
+        )
+    )
+    codes, widths, heights = classify_python(buf)
+    assert list(codes) == [CODE["png"], CODE["gif"], CODE["jpeg"], 0]
+    assert list(widths) == [640, 32, 0, 0]
+    assert list(heights) == [480, 16, 0, 0]
+
+
+@pytest.mark.parametrize("width", [PREFIX_SIZE, 24, 8])
+def test_numpy_matches_python(width):
+    pytest.importorskip("numpy")
+    buf = prefixes(random.Random(width), 2000)
+    # prefixes cut to width, trailing partial prefix is ignored
+    buf = b"".join(buf[i : i + width] for i in range(0, len(buf), PREFIX_SIZE))
+    buf += bytes(width - 1)
+    expected = [list(v) for v in classify_python(buf, width)]
+    assert [list(v) for v in classify_numpy(buf, width)] == expected
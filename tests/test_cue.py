@@ -0,0 +1,176 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kstools.cue import Cue, fmt_msf, msf  # noqa: E402
+
+SHEET = """\
+REM GENRE Rock
+REM DATE 1999
+PERFORMER "Band"
+TITLE "Album"
+FILE "a.wav" WAVE
+  TRACK 01 AUDIO
+    TITLE "One"
+    REM COMPOSER "Someone"
+    FLAGS DCP
+    ISRC ABCDE1234567
+    PREGAP 00:02:00
+    INDEX 01 00:00:00
+  TRACK 02 AUDIO
+    TITLE "Two"
+    INDEX 00 03:10:50
+    INDEX 01 03:12:00
+    POSTGAP 00:01:00
+FILE "b.wav" WAVE
+  TRACK 03 AUDIO
+    INDEX 01 00:00:00"""
+
+
+def parse(text: str) -> Cue:
+    return Cue("test.cue", text.encode("ascii"))
+
+
+def codes(cue: Cue) -> list[str]:
+    return [d.code for d in cue.diagnostics]
+
+
+def test_msf():
+    assert msf("01:02:03") == (60 + 2) * 75 + 3
+    assert fmt_msf(msf("79:59:74")) == "79:59:74"
+    for ts in ("00:60:00", "00:00:75", "1:2", "aa:00:00", "-1:00:00"):
+        assert msf(ts) == -1
+
+
+def test_round_trip():
+    cue = parse(SHEET)
+    assert cue.valid and codes(cue) == []
+    assert cue.build() == SHEET
+    assert cue.diverges(SHEET) == (False, None)
+    assert (cue.genre, cue.date, cue.title) == ("Rock", "1999", "Album")
+
+    t1, t2, t3 = cue.tracks
+    assert t1.pregap == 150 and t1.end == msf("03:10:50")
+    assert t2.indices == [(0, msf("03:10:50")), (1, msf("03:12:00"))]
+    assert t2.postgap == 75 and t2.end is None
+    assert (t3.file, t3.start) == ("b.wav", 0)
+    assert cue.timeline_errors() == []
+
+
+def test_file_between_indices():
+    text = """\
+TITLE "Album"
+FILE "a.wav" WAVE
+  TRACK 01 AUDIO
+    INDEX 01 00:00:00
+  TRACK 02 AUDIO
+    INDEX 00 04:00:00
+FILE "b.wav" WAVE
+    INDEX 01 00:00:00
+  TRACK 03 AUDIO
+    INDEX 01 02:00:00"""
+    cue = parse(text)
+    assert cue.valid
+    assert cue.build() == text
+
+    t1, t2, t3 = cue.tracks
+    # pregap of track 2 is in a.wav, which track 1 ends at
+    assert t1.end == msf("04:00:00")
+    assert (t2.file, t2.split, t2.start, t2.end) == ("b.wav", 1, 0, msf("02:00:00"))
+    assert t3.file is None
+    assert cue.files() == ["a.wav", "b.wav"]
+
+
+def test_file_after_index_01():
+    # FILE after INDEX 01 starts next track, which ends the current one
+    cue = parse(
+        'FILE "a.wav" WAVE\n'
+        "  TRACK 01 AUDIO\n"
+        "    INDEX 01 00:00:00\n"
+        'FILE "b.wav" WAVE\n'
+        "  TRACK 02 AUDIO\n"
+        "    INDEX 01 00:00:00\n"
+    )
+    t1, t2 = cue.tracks
+    assert (t1.file, t1.end) == ("a.wav", None)
+    assert (t2.file, t2.split) == ("b.wav", 0)
+
+
+def test_invalid_timestamp():
+    cue = parse(
+        'FILE "a.wav" WAVE\n'
+        "  TRACK 01 AUDIO\n"
+        "    INDEX 01 00:00:00\n"
+        "  TRACK 02 AUDIO\n"
+        "    INDEX 01 00:75:00\n"
+        "    POSTGAP 1:00\n"
+    )
+    assert not cue.valid
+    assert codes(cue) == ["invalid-timestamp", "invalid-timestamp"]
+    assert cue.diagnostics[0].line == 4
+    assert cue.diagnostics[0].message == "invalid INDEX timestamp '00:75:00'"
+
+    # invalid entries are dropped from the output
+    t2 = cue.tracks[1]
+    assert t2.indices == [] and t2.postgap is None
+    assert cue.build().splitlines()[-1] == "  TRACK 02 AUDIO"
+    assert cue.timeline_errors() == [(2, "no INDEX 01")]
+
+
+def test_index_order():
+    cue = parse(
+        'FILE "a.wav" WAVE\n'
+        "  TRACK 01 AUDIO\n"
+        "    INDEX 01 00:10:00\n"
+        "    INDEX 02 00:05:00\n"
+    )
+    assert not cue.valid
+    assert codes(cue) == ["index-order"]
+
+
+def test_throw_marks_invalid():
+    # statements after the error are not parsed
+    cue = parse('INDEX 01 00:00:00\nFILE "a.wav" WAVE\n  TRACK 01 AUDIO\n')
+    assert not cue.valid and cue.errors == 1
+    assert codes(cue) == ["outside-track"]
+    assert cue.tracks == []
+
+    cue = parse('FILE "a.wav" WAVE\n  TRACK 01 VIDEO\n')
+    assert not cue.valid
+    assert codes(cue) == ["unknown-track-type"]
+    assert cue.export()[0]["message"] == "unknown TRACK type 'VIDEO'"
+
+
+def test_postgap_round_trip():
+    text = """\
+TITLE "Disc"
+FILE "a.bin" BINARY
+  TRACK 01 MODE1/2352
+    INDEX 01 00:00:00
+    POSTGAP 00:02:00
+  TRACK 02 AUDIO
+    INDEX 00 10:00:00
+    INDEX 01 10:02:00
+    POSTGAP 00:00:00"""
+    cue = parse(text)
+    assert cue.valid and codes(cue) == []
+    assert cue.build() == text
+    t1, t2 = cue.tracks
+    assert (t1.postgap, t2.postgap) == (150, 0)
+
+    # POSTGAP is written after INDEX entries wherever it was given
+    cue = parse(
+        'FILE "a.wav" WAVE\n'
+        "  TRACK 01 AUDIO\n"
+        "    POSTGAP 00:01:00\n"
+        "    INDEX 01 00:00:00\n"
+    )
+    assert cue.valid
+    assert cue.build().splitlines()[-2:] == [
+        "    INDEX 01 00:00:00",
+        "    POSTGAP 00:01:00",
+    ]
+
+    cue = parse('POSTGAP 00:01:00\nFILE "a.wav" WAVE\n')
+    assert codes(cue) == ["outside-track"]
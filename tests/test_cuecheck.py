@@ -0,0 +1,28 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kstools.cuecheck import check_cues  # noqa: E402
+
+SHEET = 'FILE "missing.wav" WAVE\n  TRACK 01 AUDIO\n    INDEX 01 00:00:00\n'
+
+
+def test_state_keeps_verify(tmp_path):
+    for i in range(100):
+        (tmp_path / f"{i:03d}.cue").write_text(SHEET)
+    (tmp_path / "bad.cue").write_text("  TRACK 01 AUDIO\n    INDEX x 00:00:00\n")
+    paths = sorted(str(p) for p in tmp_path.glob("*.cue"))
+    state = str(tmp_path / "state.json")
+
+    summary = check_cues(paths, state=state, jobs=2)
+    assert (summary.files, summary.valid, summary.skipped) == (101, 100, 0)
+    assert summary.errors == {"parse": 1}
+
+    summary = check_cues(paths, state=state, jobs=2)
+    assert (summary.valid, summary.skipped) == (100, 100)
+
+    # state of run without --verify does not skip verification
+    summary = check_cues(paths, state=state, jobs=2, verify=True)
+    assert (summary.valid, summary.skipped) == (0, 0)
+    assert summary.errors == {"missing-file": 100, "parse": 1}
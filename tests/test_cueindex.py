@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kstools.cueindex import CueIndex  # noqa: E402
+from kstools.files import cue_paths  # noqa: E402
+
+
+def sheet(performer: str, title: str) -> str:
+    return (
+        f'PERFORMER "{performer}"\n'
+        'TITLE "Album"\n'
+        'FILE "a.wav" WAVE\n'
+        "  TRACK 01 AUDIO\n"
+        f'    TITLE "{title}"\n'
+        "    INDEX 01 00:00:00\n"
+    )
+
+
+def test_update_prune_query(tmp_path, monkeypatch):
+    music = tmp_path / "music"
+    (music / "a").mkdir(parents=True)
+    (music / "a" / "one.cue").write_text(sheet("Band", "Song"))
+    (music / "two.CUE").write_text(sheet("Other", "Tune"))
+    (music / "bad.cue").write_text("  TRACK 01 AUDIO\n    INDEX x 00:00:00\n")
+    (music / "notes.txt").write_text("")
+
+    monkeypatch.chdir(tmp_path)
+    with CueIndex(str(tmp_path / "index.db")) as index:
+        assert index.update(cue_paths(["music"])) == (3, 0)
+        one = str(music / "a" / "one.cue")
+        assert index.query("performer", "band") == [(one, None)]
+        assert index.query("title", "song") == [(one, 1)]
+        assert sorted(index.query("title", "album")) == [
+            (one, None),
+            (str(music / "two.CUE"), None),
+        ]
+        with pytest.raises(ValueError):
+            index.query("path", "x")
+
+        # unchanged files are not parsed again
+        assert index.update(cue_paths(["music"])) == (0, 0)
+
+    # prune works from another directory than the update
+    os.unlink(music / "two.CUE")
+    monkeypatch.chdir(music / "a")
+    with CueIndex(str(tmp_path / "index.db")) as index:
+        assert index.update(cue_paths([str(music)]), prune=True) == (0, 1)
+        assert index.query("performer", "other") == []
+        assert index.query("title", "song") == [(one, 1)]
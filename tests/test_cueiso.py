@@ -0,0 +1,65 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kstools.cue import Cue  # noqa: E402
+from kstools.cueiso import ISO_VD_SECTOR, USER_DATA_SIZE, cue_to_iso  # noqa: E402
+
+SYNC = b"\x00" + b"\xff" * 10 + b"\x00"
+
+
+def raw_sector(data: bytes) -> bytes:
+    """MODE1/2352 sector: sync, header, user data, zeroed EDC/ECC"""
+    return SYNC + bytes(4) + data + bytes(288)
+
+
+def iso_sectors(count: int) -> list[bytes]:
+    sectors = [bytes([i % 256]) * USER_DATA_SIZE for i in range(count)]
+    sectors[ISO_VD_SECTOR] = b"\x01CD001\x01".ljust(USER_DATA_SIZE, b"\x00")
+    return sectors
+
+
+def test_pregap(tmp_path):
+    pregap = 150
+    sectors = iso_sectors(20)
+    bin = tmp_path / "disc.bin"
+    bin.write_bytes(raw_sector(bytes(USER_DATA_SIZE)) * pregap)
+    with open(bin, "ab") as f:
+        f.write(b"".join(raw_sector(s) for s in sectors))
+
+    cue = tmp_path / "disc.cue"
+    cue.write_text(
+        'FILE "disc.bin" BINARY\n'
+        "  TRACK 01 MODE1/2352\n"
+        "    INDEX 00 00:00:00\n"
+        "    INDEX 01 00:02:00\n"
+    )
+    iso = tmp_path / "disc.iso"
+    count, err = cue_to_iso(Cue(str(cue)), str(iso))
+    assert err is None
+    assert count == len(sectors)
+    assert iso.read_bytes() == b"".join(sectors)
+
+
+def test_pregap_before_next_track(tmp_path):
+    sectors = iso_sectors(20)
+    bin = tmp_path / "disc.bin"
+    bin.write_bytes(
+        b"".join(sectors[:2])  # pregap of data track
+        + b"".join(sectors)
+        + bytes(USER_DATA_SIZE * 4)  # audio track
+    )
+    cue = tmp_path / "disc.cue"
+    cue.write_text(
+        'FILE "disc.bin" BINARY\n'
+        "  TRACK 01 MODE1/2048\n"
+        "    INDEX 00 00:00:00\n"
+        "    INDEX 01 00:00:02\n"
+        "  TRACK 02 AUDIO\n"
+        "    INDEX 01 00:00:22\n"
+    )
+    iso = tmp_path / "disc.iso"
+    count, err = cue_to_iso(Cue(str(cue)), str(iso))
+    assert err is None
+    assert iso.read_bytes() == b"".join(sectors)
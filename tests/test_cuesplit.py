@@ -0,0 +1,58 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kstools.audio import AudioInfo  # noqa: E402
+from kstools.cue import AUDIO_FRAME_SIZE, FRAMES_PER_SECOND, Cue  # noqa: E402
+from kstools.cuesplit import plan, split, wave_header  # noqa: E402
+
+SECOND = AUDIO_FRAME_SIZE * FRAMES_PER_SECOND
+
+
+def write_wave(path, seconds: int, fill: int) -> None:
+    data = bytes([fill]) * (seconds * SECOND)
+    path.write_bytes(wave_header(AudioInfo(0, 44100, 2, 16), len(data)) + data)
+
+
+def test_pregap_in_previous_file(tmp_path):
+    write_wave(tmp_path / "a.wav", 10, 1)
+    write_wave(tmp_path / "b.wav", 6, 2)
+    cue = tmp_path / "album.cue"
+    cue.write_text(
+        'FILE "a.wav" WAVE\n'
+        "  TRACK 01 AUDIO\n"
+        "    INDEX 01 00:00:00\n"
+        "  TRACK 02 AUDIO\n"
+        "    INDEX 00 00:05:00\n"
+        'FILE "b.wav" WAVE\n'
+        "    INDEX 01 00:00:00\n"
+        "  TRACK 03 AUDIO\n"
+        "    INDEX 01 00:03:00\n"
+    )
+    pieces, errors = plan(Cue(str(cue)))
+    assert errors == []
+    assert [(p.track, p.length // SECOND) for p in pieces] == [(1, 10), (2, 3), (3, 3)]
+
+    written = split(pieces, str(tmp_path))
+    total = sum(os.path.getsize(p) - 44 for p in written)
+    assert total == 16 * SECOND
+
+
+def test_mixed_sector_sizes(tmp_path):
+    data = b"\x01" * (10 * 2048) + b"\x02" * (5 * AUDIO_FRAME_SIZE)
+    (tmp_path / "image.bin").write_bytes(data)
+    cue = tmp_path / "image.cue"
+    cue.write_text(
+        'FILE "image.bin" BINARY\n'
+        "  TRACK 01 MODE1/2048\n"
+        "    INDEX 01 00:00:00\n"
+        "  TRACK 02 AUDIO\n"
+        "    INDEX 01 00:00:10\n"
+    )
+    pieces, errors = plan(Cue(str(cue)))
+    assert errors == []
+    assert [(p.offset, p.length) for p in pieces] == [
+        (0, 10 * 2048),
+        (10 * 2048, 5 * AUDIO_FRAME_SIZE),
+    ]
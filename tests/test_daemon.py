@@ -0,0 +1,88 @@
+import asyncio
+import os
+import socket
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kstools.client import ImageSizeClient  # noqa: E402
+from kstools.daemon import ImageSizeServer  # noqa: E402
+
+
+def png(w: int, h: int) -> bytes:
+    return (
+        b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+        + w.to_bytes(4, "big")
+        + h.to_bytes(4, "big")
+        + b"\x08\x02\x00\x00\x00"
+    )
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = ImageSizeServer(str(tmp_path / "sock"), line_limit=4096)
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    async def run():
+        started = asyncio.Event()
+        task = asyncio.ensure_future(server.serve(started))
+        await started.wait()
+        ready.set()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    main = loop.create_task(run())
+    thread = threading.Thread(target=loop.run_until_complete, args=(main,))
+    thread.start()
+    assert ready.wait(5)
+    yield server
+    loop.call_soon_threadsafe(main.cancel)
+    thread.join(5)
+    loop.close()
+
+
+def test_sizes(server, tmp_path):
+    a = tmp_path / "a.png"
+    a.write_bytes(png(3, 2))
+    missing = str(tmp_path / "missing.png")
+    with ImageSizeClient(server.path, timeout=5) as client:
+        r1, r2 = client.sizes([str(a), missing])
+        assert (r1["path"], r1["width"], r1["height"]) == (str(a), 3, 2)
+        assert r2["path"] == missing and "error" in r2
+        assert client.size(str(a)) == r1
+        assert (server.hits, server.misses) == (1, 1)
+
+        # changed file is parsed again
+        a.write_bytes(png(30, 20) + b"\x00")
+        assert client.size(str(a))["width"] == 30
+
+        assert client.sizes([1])[0]["error"] == "Path is not a string"
+
+
+def test_line_limit(server):
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.settimeout(5)
+        sock.connect(server.path)
+        sock.sendall(b'{"paths": ["' + b"x" * 8192 + b'"]}\n')
+        line = sock.makefile("rb").readline()
+    assert line.startswith(b'{"error": "Bad request:')
+
+    # server keeps answering other clients
+    with ImageSizeClient(server.path, timeout=5) as client:
+        assert "error" in client.size("missing")
+
+
+def test_socket_path(tmp_path):
+    path = tmp_path / "sock"
+    path.write_bytes(b"data")
+    server = ImageSizeServer(str(path))
+    with pytest.raises(FileExistsError):
+        asyncio.run(server.serve())
+    server.close()
+    assert path.read_bytes() == b"data"
@@ -0,0 +1,30 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kstools.files import match_ext, scanfiles, scanfiles_parallel  # noqa: E402
+
+
+def test_match_ext():
+    assert match_ext("a.PNG", {"png"})
+    assert not match_ext(".png", {"png"})
+    assert not match_ext("png", {"png"})
+    assert match_ext("png", None)
+
+
+def test_scanfiles_parallel(tmp_path):
+    for i in range(20):
+        d = tmp_path / f"d{i % 4}" / f"e{i % 3}" / f"f{i}"
+        d.mkdir(parents=True)
+        (d / f"{i}.png").write_bytes(b"")
+        (d / f"{i}.txt").write_bytes(b"")
+    (tmp_path / "top.PNG").write_bytes(b"")
+    os.symlink(tmp_path / "d0", tmp_path / "link")
+
+    for exts in ({"png"}, None):
+        expected = {e.path for e in scanfiles(str(tmp_path), exts)}
+        assert len(expected) == (21 if exts else 41)
+        for workers in (1, 4):
+            found = [e.path for e in scanfiles_parallel(str(tmp_path), exts, workers)]
+            assert sorted(found) == sorted(expected)
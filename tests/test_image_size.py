@@ -1,17 +1,27 @@
+import json
 import os
 import sys
-from subprocess import CalledProcessError, check_output
-from typing import Type
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from hashlib import sha1
+from subprocess import DEVNULL, CalledProcessError, check_output
+from typing import Optional, Type
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from kstools.bmp import BmpParser, bmp_exts  # noqa: E402
+from kstools.dds import DdsParser, dds_exts  # noqa: E402
 from kstools.gif import GifParser, gif_exts  # noqa: E402
-from kstools.isobmff import IFFParser, iso_exts  # noqa: E402
+from kstools.isobmff import IFFParser, iso_exts, mov_exts  # noqa: E402
 from kstools.jpeg import JpegParser, jpeg_exts  # noqa: E402
 from kstools.jpegxl import JpegxlParser, jpegxl_exts  # noqa: E402
+from kstools.ktx import KtxParser, ktx_exts  # noqa: E402
 from kstools.magic import parse_stream  # noqa: E402
 from kstools.png import PngParser, png_exts  # noqa: E402
+from kstools.psd import PsdParser, psd_exts  # noqa: E402
+from kstools.qoi import QoiParser, qoi_exts  # noqa: E402
+from kstools.tga import TgaParser, tga_exts  # noqa: E402
 from kstools.tiff import TiffParser, tiff_exts  # noqa: E402
 from kstools.webp import WebpParser, webp_exts  # noqa: E402
 
@@ -35,6 +45,11 @@ def identify(fpath: str) -> str:
     return real
 
 
+def identify_first(fpath: str) -> str:
+    """Returns size of first image only, e.g. PSD composite without layers"""
+    return identify(fpath + "[0]")
+
+
 def jxlinfo(fpath: str) -> str:
     real = check_output(["jxlinfo", fpath]).decode("utf-8")
     split = real.split(",")
@@ -42,15 +57,68 @@ def jxlinfo(fpath: str) -> str:
     return real
 
 
+def ffprobe(fpath: str) -> str:
+    """Returns display size of first video stream"""
+    real = check_output(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "stream=width,height:stream_side_data=rotation",
+            "-of",
+            "json",
+            fpath,
+        ]
+    ).decode("utf-8")
+    streams = json.loads(real).get("streams")
+    if not streams:
+        return "invalid file"
+    stream = streams[0]
+    w, h = stream["width"], stream["height"]
+    rotation = sum(d.get("rotation", 0) for d in stream.get("side_data_list", ()))
+    if rotation % 180:
+        w, h = h, w
+    return f"{w}x{h}"
+
+
+# commands printing version of reference tool programs
+TOOL_VERSION = {
+    identify: ["identify", "-version"],
+    identify_first: ["identify", "-version"],
+    jxlinfo: ["jxlinfo", "--version"],
+    ffprobe: ["ffprobe", "-version"],
+}
+
+
+@lru_cache(maxsize=None)
+def tool_key(tool) -> str:
+    """Returns name of reference tool function and version of its program"""
+    try:
+        out = check_output(TOOL_VERSION[tool], stderr=DEVNULL).decode("utf-8")
+    except (OSError, CalledProcessError, UnicodeDecodeError):
+        out = ""
+    lines = out.strip().splitlines()
+    return f"{tool.__name__} {lines[0] if lines else 'unknown'}"
+
+
 def gen_lookup() -> dict:
     d = {}
     parsers = (
         (bmp_exts, BmpParser, identify),
+        (dds_exts, DdsParser, identify),
         (gif_exts, GifParser, identify),
         (jpeg_exts, JpegParser, identify),
         (jpegxl_exts, JpegxlParser, jxlinfo),
         (iso_exts, IFFParser, identify),
+        (ktx_exts, KtxParser, identify),
+        (mov_exts, IFFParser, ffprobe),
         (png_exts, PngParser, identify),
+        (psd_exts, PsdParser, identify_first),
+        (qoi_exts, QoiParser, identify),
+        (tga_exts, TgaParser, identify),
         (tiff_exts, TiffParser, identify),
         (webp_exts, WebpParser, identify),
     )
@@ -64,8 +132,162 @@ def clsname(v: Type):
     return v.__name__ if v else "None"
 
 
-def test():
-    path = sys.argv[1] if len(sys.argv) > 1 else "."
+def manifest_file(path: str) -> str:
+    """Returns default manifest path of corpus, outside of the corpus"""
+    cache = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    name = sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache, "kstools", f"image_size_{name}.json")
+
+
+@dataclass
+class FileResult:
+    path: str
+    ext: str
+    size: str = None
+    err: str = None
+    guess: str = None
+    parser: str = None
+    byte_count: int = 0
+    bytes_read: int = 0
+    seek_count: int = 0
+
+
+@dataclass
+class FormatStats:
+    files: int = 0
+    failures: int = 0
+    byte_count: int = 0
+    bytes_read: int = 0
+    seek_count: int = 0
+
+    def add(self, r: FileResult, failed: bool) -> None:
+        self.files += 1
+        self.failures += failed
+        self.byte_count += r.byte_count
+        self.bytes_read += r.bytes_read
+        self.seek_count += r.seek_count
+
+
+def check_file(task: tuple) -> FileResult:
+    """Runs parser of file extension and magic guess in worker process"""
+    fpath, ext = task
+    parser = gen_lookup()[ext][0]
+    r = FileResult(fpath, ext, parser=clsname(parser))
+    with open(fpath, "rb") as s:
+        p = parser(s)
+        sz, r.err = p.image_size()
+
+        guess, _ = parse_stream(s)
+        r.guess = clsname(guess)
+        r.byte_count = s.seek(0, 2)
+        r.bytes_read = p.stream.bytes_read
+        r.seek_count = p.stream.seek_count
+
+    if sz:
+        r.size = f"{sz.width}x{sz.height}"
+    return r
+
+
+def file_digest(fpath: str) -> str:
+    h = sha1()
+    with open(fpath, "rb") as f:
+        while chunk := f.read(1 << 20):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def reference(task: tuple) -> str:
+    fpath, ext = task
+    try:
+        return gen_lookup()[ext][1](fpath)
+    except CalledProcessError:
+        return "invalid file"
+
+
+def load_manifest(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(path: str, manifest: dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def update_manifest(manifest: dict, files: list, jobs: Optional[int]) -> int:
+    """Runs reference tools only for new or changed files"""
+    """  Entries are keyed by path and checked by reference tool, its version,
+    size and mtime; when only size or mtime differ but SHA-1 of contents
+    matches, the reference size is reused. Entries of files which are gone
+    are dropped. Returns number of files passed to reference tools."""
+    lookup = gen_lookup()
+    todo = []
+    current = {}
+    for fpath, ext in files:
+        st = os.stat(fpath)
+        tool = tool_key(lookup[ext][1])
+        entry = manifest.get(fpath)
+        if entry and entry.get("tool") != tool:
+            entry = None
+        if entry and (entry["size"], entry["mtime"]) == (st.st_size, st.st_mtime_ns):
+            current[fpath] = entry
+            continue
+
+        digest = file_digest(fpath)
+        if entry and entry["sha1"] == digest:
+            entry["size"], entry["mtime"] = st.st_size, st.st_mtime_ns
+            current[fpath] = entry
+            continue
+
+        current[fpath] = {
+            "size": st.st_size,
+            "mtime": st.st_mtime_ns,
+            "sha1": digest,
+            "tool": tool,
+        }
+        todo.append((fpath, ext))
+
+    # reference tools are separate processes, threads are enough
+    with ThreadPoolExecutor(jobs) as pool:
+        for (fpath, _), real in zip(todo, pool.map(reference, todo)):
+            current[fpath]["real"] = real
+
+    manifest.clear()
+    manifest.update(current)
+    return len(todo)
+
+
+def find_files(path: str) -> list:
+    exts = gen_lookup().keys()
+    files = []
+    for root, _, names in os.walk(path):
+        for f in names:
+            ext = fileextlow(f)
+            if ext in exts:
+                files.append((os.path.join(root, f), ext))
+    return files
+
+
+def test(path: str = None, manifest_path: str = None, jobs: int = None):
+    """Compares parser results with reference sizes of files under path"""
+    """  Reference sizes are cached in manifest_path (manifest_file() of path
+    in user cache directory by default, so the corpus is not written to);
+    parsers and reference tools run in parallel."""
+    if not path:
+        path = sys.argv[1] if len(sys.argv) > 1 else "."
+    manifest_path = manifest_path or manifest_file(path)
+
+    files = find_files(path)
+    manifest = load_manifest(manifest_path)
+    updated = update_manifest(manifest, files, jobs)
+    if files:
+        os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+        save_manifest(manifest_path, manifest)
+
     file_count = 0
     byte_count = 0
     failures = 0
@@ -74,51 +296,32 @@ def test():
     wrong_guess = 0
     errors = {}
     failed = []
-    lookup = gen_lookup()
-    exts = lookup.keys()
+    formats = {}
 
-    for root, _, files in os.walk(path):
-        for f in files:
-            ext = fileextlow(f)
-            if ext not in exts:
-                continue
-
-            fpath = os.path.join(root, f)
-            with open(fpath, "rb") as s:
-                parser, real = lookup[ext]
-                p = parser(s)
-                sz, err = p.image_size()
-
-                guess, _ = parse_stream(s)
-                s.seek(0, 2)
-                file_count += 1
-                byte_count += s.tell()
-                bytes_read += p.stream.bytes_read
-                seek_count += p.stream.seek_count
-
-            if sz:
-                sz = f"{sz.width}x{sz.height}"
-            try:
-                real = real(fpath)
-            except CalledProcessError:
-                real = "invalid file"
-
-            print(
-                f"{fpath}: {sz} (real {real});"
-                f" {clsname(parser)} guess={clsname(guess)}"
-            )
-
-            if not sz or sz != real or guess != parser:
+    with ProcessPoolExecutor(jobs) as pool:
+        for r in pool.map(check_file, files, chunksize=64):
+            real = manifest[r.path]["real"]
+            print(f"{r.path}: {r.size} (real {real}); {r.parser} guess={r.guess}")
+
+            file_count += 1
+            byte_count += r.byte_count
+            bytes_read += r.bytes_read
+            seek_count += r.seek_count
+
+            err = r.err
+            fail = not r.size or r.size != real or r.guess != r.parser
+            formats.setdefault(r.ext, FormatStats()).add(r, fail)
+            if fail:
                 failures += 1
-                if guess != parser:
+                if r.guess != r.parser:
                     wrong_guess += 1
                     err = err or "wrong guess"
-                failed.append(fpath)
+                failed.append(r.path)
                 err = err or "wrong size"
                 count = errors.get(err, 0)
                 errors[err] = count + 1
 
-    print(f"file_count={file_count} byte_count={byte_count}")
+    print(f"file_count={file_count} byte_count={byte_count} reference_runs={updated}")
     avg = f" (avg={seek_count/file_count:.02f}/file)" if file_count else ""
     print(
         f"bytes_read={bytes_read} ({perc(bytes_read, byte_count)})"
@@ -128,6 +331,13 @@ def test():
         f"failures={failures} ({perc(failures, file_count)})"
         f" wrong_guess={wrong_guess} errors={errors}"
     )
+    for ext, st in sorted(formats.items()):
+        print(
+            f"{ext:5} files={st.files} failures={st.failures}"
+            f" ({perc(st.failures, st.files)})"
+            f" bytes_read={st.bytes_read} ({perc(st.bytes_read, st.byte_count)})"
+            f" seeks/file={st.seek_count / st.files:.02f}"
+        )
 
     MAX = 25
     for i, fpath in enumerate(failed):
@@ -139,4 +349,11 @@ def test():
 
 
 if __name__ == "__main__":
-    sys.exit(test())
+    from argparse import ArgumentParser
+
+    p = ArgumentParser(description="Compare image sizes with reference tools")
+    p.add_argument("path", nargs="?", default=".", help="corpus directory")
+    p.add_argument("--manifest", help="reference size cache, default in ~/.cache")
+    p.add_argument("--jobs", type=int, help="number of worker processes")
+    args = p.parse_args()
+    sys.exit(test(args.path, args.manifest, args.jobs))
@@ -0,0 +1,82 @@
+import os
+import sys
+from io import BytesIO
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kstools.isobmff import heif_contents, isobmff_image_size  # noqa: E402
+from kstools.types import ImageSize, VideoSize  # noqa: E402
+
+IDENTITY = (0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000)
+
+
+def u32(*values: int) -> bytes:
+    return b"".join((v & 0xFFFFFFFF).to_bytes(4, "big") for v in values)
+
+
+def box(text: bytes, payload: bytes = b"") -> bytes:
+    return u32(8 + len(payload)) + text + payload
+
+
+def ftyp(*brands: bytes) -> bytes:
+    return box(b"ftyp", brands[0] + u32(0) + b"".join(brands))
+
+
+def moov(w: int, h: int, matrix: tuple = IDENTITY) -> bytes:
+    mvhd = box(b"mvhd", u32(0, 0, 0, 1000, 5000))
+    head = u32(0, 0, 0, 1, 0, 5000) + bytes(16)
+    tkhd = box(b"tkhd", head + u32(*matrix, w << 16, h << 16))
+    hdlr = box(b"hdlr", u32(0, 0) + b"vide")
+    return box(b"moov", mvhd + box(b"trak", tkhd + box(b"mdia", hdlr)))
+
+
+def meta(w: int, h: int) -> bytes:
+    ispe = box(b"ispe", u32(0, w, h))
+    ipma = box(b"ipma", u32(0, 1) + b"\x00\x01\x01\x81")
+    infe = box(b"infe", u32(2 << 24) + b"\x00\x01\x00\x00hvc1")
+    iinf = box(b"iinf", u32(0) + b"\x00\x01" + infe)
+    pitm = box(b"pitm", u32(0) + b"\x00\x01")
+    iprp = box(b"iprp", box(b"ipco", ispe) + ipma)
+    return box(b"meta", u32(0) + pitm + iinf + iprp)
+
+
+def test_heif_moov_before_meta():
+    # image sequence or preview video does not hide the primary image
+    data = ftyp(b"heic", b"mif1", b"msf1") + moov(320, 240) + meta(4032, 3024)
+    assert isobmff_image_size(BytesIO(data)) == (ImageSize(4032, 3024), None)
+
+    data = ftyp(b"avis", b"msf1") + moov(320, 240)
+    size, err = isobmff_image_size(BytesIO(data))
+    assert err is None and (size.width, size.height) == (320, 240)
+
+    # only HEIF brands prefer meta
+    data = ftyp(b"isom", b"mp42") + moov(320, 240) + meta(4032, 3024)
+    assert isinstance(isobmff_image_size(BytesIO(data))[0], VideoSize)
+
+
+def test_truncated_full_box():
+    data = ftyp(b"mif1") + box(b"meta", u32(0) + box(b"pitm"))
+    items, tracks, _ = heif_contents(BytesIO(data))
+    assert items == [] and tracks == []
+
+    items, _, _ = heif_contents(BytesIO(ftyp(b"mif1") + meta(64, 48)))
+    assert [(i.id, i.type, i.width, i.height, i.role) for i in items] == [
+        (1, "hvc1", 64, 48, "primary")
+    ]
+
+
+def test_mp4_moov_at_end():
+    # 64 bit largesize mdat before moov is skipped by its header
+    mdat = u32(1) + b"mdat" + (16 + 4096).to_bytes(8, "big") + bytes(4096)
+    rotated = (0, 0x10000, 0, -0x10000, 0, 0, 0, 0, 0x40000000)
+    data = ftyp(b"isom", b"mp42") + mdat + moov(1920, 1080, rotated)
+    size, err = isobmff_image_size(BytesIO(data))
+    assert err is None
+    assert (size.width, size.height, size.rotation) == (1080, 1920, 90)
+    assert size.duration == 5.0 and size.matrix == rotated
+
+    size, err = isobmff_image_size(BytesIO(ftyp(b"qt  ") + mdat + moov(640, 480)))
+    assert (size.width, size.height, size.rotation) == (640, 480, 0)
+
+    size, err = isobmff_image_size(BytesIO(ftyp(b"isom") + mdat))
+    assert (size, err) == (None, "meta not found")
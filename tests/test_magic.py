@@ -0,0 +1,68 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kstools.magic import image_stream_size  # noqa: E402
+
+PNG = (
+    b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+    + (300).to_bytes(4, "big")
+    + (200).to_bytes(4, "big")
+    + b"\x08\x02\x00\x00\x00"
+)
+# APP0 segment larger than pipe buffer before SOF0
+JPEG = (
+    b"\xff\xd8\xff\xe0\xff\xff"
+    + bytes(0xFFFD)
+    + b"\xff\xc0\x00\x11\x08"
+    + (120).to_bytes(2, "big")
+    + (160).to_bytes(2, "big")
+    + bytes(10)
+    + b"\xff\xd9"
+)
+TGA = (
+    bytes([0, 0, 2])
+    + bytes(9)
+    + (64).to_bytes(2, "little")
+    + (32).to_bytes(2, "little")
+    + bytes([24, 0])
+    + bytes(64 * 32 * 3)
+    + bytes(8)
+    + b"TRUEVISION-XFILE.\x00"
+)
+
+
+def pipe_size(data: bytes, footer: bool = True):
+    r, w = os.pipe()
+
+    def write():
+        try:
+            with open(w, "wb") as f:
+                f.write(data)
+        except BrokenPipeError:
+            # parser stops reading after the header
+            pass
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    with open(r, "rb") as f:
+        assert not f.seekable()
+        result = image_stream_size(f, footer)
+    writer.join()
+    return result
+
+
+@pytest.mark.parametrize(
+    "data, size", [(PNG, (300, 200)), (JPEG, (160, 120)), (TGA, (64, 32))]
+)
+def test_pipe(data, size):
+    sz, err = pipe_size(data)
+    assert err is None and (sz.width, sz.height) == size
+
+
+def test_pipe_no_footer():
+    assert pipe_size(TGA, footer=False) == (None, "Unknown file")
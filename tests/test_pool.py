@@ -0,0 +1,45 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kstools.pool import INFLIGHT, image_sizes  # noqa: E402
+
+
+def png(w: int, h: int) -> bytes:
+    return (
+        b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+        + w.to_bytes(4, "big")
+        + h.to_bytes(4, "big")
+        + b"\x08\x02\x00\x00\x00"
+    )
+
+
+def test_image_sizes_order(tmp_path):
+    paths = []
+    for i in range(200):
+        path = tmp_path / f"{i}.png"
+        if i % 7:
+            path.write_bytes(png(i + 1, 2 * i + 1))
+        paths.append(str(path))
+
+    consumed = []
+
+    def lazy():
+        for p in paths:
+            consumed.append(p)
+            yield p
+
+    results = image_sizes(lazy(), workers=2)
+    path, (size, err) = next(results)
+    assert path == paths[0] and size is None and "No such file" in err
+    # paths iterable is consumed only as far as the queue of jobs
+    assert len(consumed) <= 2 * INFLIGHT + 1
+
+    results = [(path, size, err)] + [(p, s, e) for p, (s, e) in results]
+    assert [r[0] for r in results] == paths
+    for i, (_, size, err) in enumerate(results):
+        if i % 7:
+            assert err is None and (size.width, size.height) == (i + 1, 2 * i + 1)
+        else:
+            assert size is None and err
@@ -0,0 +1,41 @@
+import errno
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kstools import schedule  # noqa: E402
+
+
+def gif(w: int, h: int) -> bytes:
+    return b"GIF89a" + w.to_bytes(2, "little") + h.to_bytes(2, "little") + bytes(3)
+
+
+def unsupported(*args):
+    raise OSError(errno.EOPNOTSUPP, "Operation not supported")
+
+
+def test_no_fiemap(tmp_path, monkeypatch):
+    paths = []
+    for i in range(10):
+        path = tmp_path / f"{i}.gif"
+        path.write_bytes(gif(i + 1, 1))
+        paths.append(str(path))
+
+    # file systems without FIEMAP (tmpfs, NFS) and without fadvise
+    monkeypatch.setattr(schedule, "ioctl", unsupported)
+    monkeypatch.setattr(os, "posix_fadvise", unsupported, raising=False)
+    assert schedule.physical_offset(paths[0]) == -1
+    assert schedule.physical_offset(str(tmp_path / "missing")) == -1
+
+    # falls back to inode order
+    expected = schedule.disk_order(paths)
+    assert schedule.disk_order(reversed(paths), physical=True) == expected
+    entries = list(os.scandir(tmp_path))
+    assert schedule.disk_order(entries, physical=True) == expected
+
+    results = dict(schedule.scheduled_image_sizes(paths, depth=4, physical=True))
+    assert sorted(results) == sorted(paths)
+    for i, path in enumerate(paths):
+        size, err = results[path]
+        assert err is None and size.width == i + 1
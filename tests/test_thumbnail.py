@@ -0,0 +1,70 @@
+import os
+import sys
+from io import BytesIO
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from kstools.thumbnail import exif_thumbnail  # noqa: E402
+
+# embedded JPEG: SOI, SOF0 with 160x120, EOI
+THUMB = (
+    b"\xff\xd8\xff\xc0\x00\x11\x08"
+    + (120).to_bytes(2, "big")
+    + (160).to_bytes(2, "big")
+    + bytes(10)
+    + b"\xff\xd9"
+)
+
+
+def entry(tag: int, value: int, order: str) -> bytes:
+    # LONG entry with single value
+    return (
+        tag.to_bytes(2, order)
+        + (4).to_bytes(2, order)
+        + (1).to_bytes(4, order)
+        + value.to_bytes(4, order)
+    )
+
+
+def exif_jpeg(order: str, ifd1: int) -> bytes:
+    """JPEG with EXIF APP1 whose IFD1 is at ifd1 offset of TIFF header"""
+    sig = b"II" if order == "little" else b"MM"
+    tiff = sig + (42).to_bytes(2, order) + (8).to_bytes(4, order)
+    # IFD#0 with ImageWidth only, links to IFD#1
+    tiff += (1).to_bytes(2, order) + entry(256, 4000, order) + ifd1.to_bytes(4, order)
+    tiff = tiff.ljust(ifd1, b"\x00")
+    thumb_offs = ifd1 + 2 + 2 * 12 + 4
+    tiff += (2).to_bytes(2, order)
+    tiff += entry(513, thumb_offs, order) + entry(514, len(THUMB), order)
+    tiff += bytes(4)
+    tiff += THUMB
+    app1 = b"Exif\x00\x00" + tiff
+    return (
+        b"\xff\xd8\xff\xe1"
+        + (len(app1) + 2).to_bytes(2, "big")
+        + app1
+        + b"\xff\xda\x00\x02\xff\xd9"
+    )
+
+
+@pytest.mark.parametrize("order", ["little", "big"])
+@pytest.mark.parametrize("ifd1", [28, 30])  # 4 byte and 2 byte aligned
+def test_exif_thumbnail(order, ifd1):
+    data = exif_jpeg(order, ifd1)
+    thumb, err = exif_thumbnail(BytesIO(data))
+    assert err is None
+    assert (thumb.width, thumb.height, thumb.compression) == (160, 120, 6)
+    assert data[thumb.offset : thumb.offset + thumb.length] == THUMB
+
+
+def test_odd_ifd_offset():
+    thumb, err = exif_thumbnail(BytesIO(exif_jpeg("little", 29)))
+    assert thumb is None
+    assert err == "Invalid IFD#1 offset 1d000000 (29)"
+
+
+def test_no_exif():
+    thumb, err = exif_thumbnail(BytesIO(THUMB))
+    assert thumb is None and err == "EXIF not found"
@@ -0,0 +1,34 @@
+from struct import Struct
+from typing import IO
+
+from .types import ImageParser, ImageSize, ImageSizeResult, PreadStream
+
+tga_exts = ("tga", "icb", "vda", "vst")
+
+# http://www.dca.fee.unicamp.br/~martino/disciplinas/ea978/tgaffs.pdf
+HEADER = Struct("<BBB5xHHHHBB")
+TGA_TYPES = (1, 2, 3, 9, 10, 11, 32, 33)
+
+
+class TgaParser(ImageParser):
+    def __init__(self, stream: IO[bytes]):
+        self.stream = PreadStream(stream)
+
+    def image_size(self) -> ImageSizeResult:
+        data = self.stream.pread(0, HEADER.size)
+        if len(data) < HEADER.size:
+            return (None, "EOF")
+
+        _, cmap, itype, _, _, w, h, depth, _ = HEADER.unpack(data)
+        if cmap > 1:
+            return (None, f"Invalid TGA color map type {cmap}")
+        if itype not in TGA_TYPES:
+            return (None, f"Unknown TGA image type {itype}")
+        if depth not in (1, 8, 15, 16, 24, 32):
+            return (None, f"Invalid TGA pixel depth {depth}")
+
+        return (ImageSize(w, h), None)
+
+
+def tga_image_size(stream: IO[bytes]) -> ImageSizeResult:
+    return TgaParser(stream).image_size()
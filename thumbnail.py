@@ -0,0 +1,155 @@
+import mmap
+from contextlib import contextmanager
+from typing import IO, Iterator, Optional, Tuple
+
+from .jpeg import JpegParser
+from .tiff import (
+    IFD,
+    Compression,
+    ImageLength,
+    ImageWidth,
+    JPEGInterchangeFormat,
+    JPEGInterchangeFormatLength,
+    NewSubfileType,
+    StripByteCounts,
+    StripOffsets,
+    SubIFDs,
+    TiffParser,
+    getint,
+)
+from .types import ImageSize, WindowStream, b2x
+
+# TIFF Compression values
+JPEG_COMPRESSION = (6, 7)
+
+
+class Thumbnail(ImageSize):
+    """Embedded preview image: byte range in file and its dimensions"""
+
+    __slots__ = ("offset", "length", "compression")
+
+    def __init__(
+        self, width: int, height: int, offset: int, length: int, compression: int
+    ):
+        super().__init__(width, height)
+        self.offset = offset
+        self.length = length
+        self.compression = compression  # TIFF Compression, 6 for JPEG
+
+
+ThumbnailResult = Tuple[Thumbnail, str]
+
+
+def ifd_value(tiff: TiffParser, ifd: IFD, tag: int) -> Optional[int]:
+    if tag not in ifd:
+        return None
+    value, err = getint(ifd[tag], tiff.order)
+    return None if err else value
+
+
+def ifd_thumbnail(tiff: TiffParser, ifd: IFD) -> ThumbnailResult:
+    """Returns location of image described by IFD"""
+    w = ifd_value(tiff, ifd, ImageWidth)
+    h = ifd_value(tiff, ifd, ImageLength)
+    compression = ifd_value(tiff, ifd, Compression) or 1
+
+    offs = ifd_value(tiff, ifd, JPEGInterchangeFormat)
+    if offs is not None:
+        length = ifd_value(tiff, ifd, JPEGInterchangeFormatLength)
+        if not length:
+            return (None, "JPEGInterchangeFormatLength not found")
+        offs += tiff.base
+        compression = 6
+    elif StripOffsets in ifd and StripByteCounts in ifd:
+        offsets, err = tiff.getints(ifd[StripOffsets])
+        if err:
+            return (None, err)
+        counts, err = tiff.getints(ifd[StripByteCounts])
+        if err:
+            return (None, err)
+        if not offsets or len(offsets) != len(counts):
+            return (None, "Invalid strips")
+        # strips are served as one range only if they follow each other
+        for i in range(1, len(offsets)):
+            if offsets[i] != offsets[i - 1] + counts[i - 1]:
+                return (None, "Strips are not contiguous")
+        offs = offsets[0] + tiff.base
+        length = sum(counts)
+    else:
+        return (None, "Image data not found")
+
+    if (w is None or h is None) and compression in JPEG_COMPRESSION:
+        window = WindowStream(tiff.stream.stream, offs, length)
+        size, err = JpegParser(window).image_size()
+        if err:
+            return (None, f"Thumbnail: {err}")
+        w, h = size.width, size.height
+    if w is None or h is None:
+        return (None, "Thumbnail dimensions not found")
+
+    return (Thumbnail(w, h, offs, length, compression), None)
+
+
+def tiff_thumbnail(tiff: TiffParser) -> ThumbnailResult:
+    """Returns first IFD1+ image or reduced resolution SubIFD image"""
+    subifds = []
+    err = "Thumbnail not found"
+    for idx, _, ifd, ifd_err in tiff.ifds():
+        if ifd_err and not ifd:
+            return (None, ifd_err)
+
+        if idx == 0:
+            if SubIFDs in ifd:
+                subifds, sub_err = tiff.getints(ifd[SubIFDs])
+                if sub_err:
+                    return (None, sub_err)
+            continue
+
+        thumb, err = ifd_thumbnail(tiff, ifd)
+        if thumb:
+            return (thumb, None)
+
+    # ascending order keeps ForwardStream reads forward
+    for offs in sorted(subifds):
+        ifd, _, ifd_err = tiff.read_ifd(offs)
+        if ifd_err and not ifd:
+            return (None, ifd_err)
+        # bit 0 of NewSubfileType is set for reduced resolution images
+        if not (ifd_value(tiff, ifd, NewSubfileType) or 0) & 1:
+            continue
+        thumb, err = ifd_thumbnail(tiff, ifd)
+        if thumb:
+            return (thumb, None)
+
+    return (None, err)
+
+
+def exif_thumbnail(stream: IO[bytes]) -> ThumbnailResult:
+    """Locates embedded thumbnail of JPEG (EXIF IFD1) or TIFF file"""
+    """  Only headers and IFDs are read; image data is not touched."""
+    stream.seek(0)
+    sig = stream.read(2)
+    if sig == b"\xff\xd8":
+        base, err = JpegParser(stream).exif_offset()
+        if err:
+            return (None, err)
+        return tiff_thumbnail(TiffParser(stream, base))
+    if sig in (b"II", b"MM"):
+        return tiff_thumbnail(TiffParser(stream))
+    return (None, f"Unknown signature {b2x(sig)}")
+
+
+@contextmanager
+def thumbnail_view(f: IO[bytes], thumb: Thumbnail) -> Iterator[memoryview]:
+    """Maps thumbnail bytes of opened file without copying"""
+    """  View must not be used after the context exits."""
+    start = thumb.offset - thumb.offset % mmap.ALLOCATIONGRANULARITY
+    size = thumb.offset + thumb.length - start
+    with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ, offset=start) as m:
+        view = memoryview(m)
+        data = view[thumb.offset - start :]
+        try:
+            yield data
+        finally:
+            data.release()
+            view.release()
@@ -6,12 +6,41 @@ tiff_exts = ("tiff",)
 
 # https://www.itu.int/itudoc/itu-t/com16/tiff-fx/docs/tiff6.pdf
 
+NewSubfileType: int = 254
+"""A general indication of the kind of data contained in this subfile."""
+
 ImageWidth: int = 256
 """The number of columns in the image, i.e., the number of pixels per row."""
 
 ImageLength: int = 257
 """The number of rows of pixels in the image."""
 
+Compression: int = 259
+"""Compression scheme used on the image data."""
+
+StripOffsets: int = 273
+"""For each strip, the byte offset of that strip."""
+
+StripByteCounts: int = 279
+"""For each strip, the number of bytes in the strip after compression."""
+
+SubIFDs: int = 330
+"""Offsets to child IFDs (TIFF Technical Note 1)."""
+
+JPEGInterchangeFormat: int = 513
+"""Offset to the start of JPEG SOI marker (EXIF IFD1 thumbnail)."""
+
+JPEGInterchangeFormatLength: int = 514
+"""Length in bytes of the JPEG stream."""
+
+IFD_ENTRY = 12
+
+# sizes of SHORT, LONG and IFD types
+INT_TYPES = {3: 2, 4: 4, 13: 4}
+
+# IFD entries by tag
+IFD = dict[int, bytes]
+
 
 def getint(data: bytes, order: str) -> Tuple[int, str]:
     t = int.from_bytes(data[2:4], order)
@@ -23,76 +52,111 @@ def getint(data: bytes, order: str) -> Tuple[int, str]:
 
 
 class TiffParser(ImageParser):
-    def __init__(self, stream: IO[bytes]):
+    def __init__(self, stream: IO[bytes], base: int = 0):
+        """base is offset of TIFF header in stream, e.g. in JPEG APP1"""
         self.stream = PreadStream(stream)
-
-    def image_size_endian(self, order: str) -> ImageSizeResult:
-        data = self.stream.pread(2, 6)
-        if len(data) < 6:
-            return (None, "EOF")
-
-        magic = int.from_bytes(data[:2], order)
+        self.base = base
+        self.order = None
+
+    def header(self) -> Tuple[int, str]:
+        """Returns offset of IFD#0"""
+        data = self.stream.pread(self.base, 8)
+        if len(data) < 2:
+            return (0, "EOF")
+
+        if data[:2] == b"II":
+            self.order = "little"
+        elif data[:2] == b"MM":
+            self.order = "big"
+        else:
+            return (0, f"Invalid byte order {b2x(data[:2])}")
+
+        if len(data) < 8:
+            return (0, "EOF")
+
+        magic = int.from_bytes(data[2:4], self.order)
         if magic != 42:
-            return (None, f"Invalid TIFF magic {b2x(data[:2])}")
+            return (0, f"Invalid TIFF magic {b2x(data[2:4])}")
+
+        return (int.from_bytes(data[4:8], self.order), None)
+
+    def read_ifd(self, offs: int) -> Tuple[IFD, int, str]:
+        """Returns IFD entries and offset of next IFD"""
+        """  Whole IFD is read at once. On EOF entries read so far
+        are returned with the error."""
+        data = self.stream.pread(self.base + offs, 2)
+        if len(data) < 2:
+            return ({}, 0, "EOF")
+
+        nr = int.from_bytes(data, self.order)
+        data = self.stream.read(nr * IFD_ENTRY + 4)
+        entries = {}
+        for i in range(0, min(nr * IFD_ENTRY, len(data) - IFD_ENTRY + 1), IFD_ENTRY):
+            tag = int.from_bytes(data[i : i + 2], self.order)
+            entries.setdefault(tag, data[i : i + IFD_ENTRY])
+
+        if len(data) < nr * IFD_ENTRY + 4:
+            return (entries, 0, "EOF")
+        return (entries, int.from_bytes(data[-4:], self.order), None)
+
+    def getints(self, entry: bytes) -> Tuple[list[int], str]:
+        """Returns all values of SHORT, LONG or IFD entry"""
+        t = int.from_bytes(entry[2:4], self.order)
+        size = INT_TYPES.get(t)
+        if not size:
+            return ([], f"Invalid type {b2x(entry[2:4])} ({t})")
+
+        count = int.from_bytes(entry[4:8], self.order)
+        if count * size <= 4:
+            data = entry[8 : 8 + count * size]
+        else:
+            offs = int.from_bytes(entry[8:12], self.order)
+            data = self.stream.pread(self.base + offs, count * size)
+            if len(data) < count * size:
+                return ([], "EOF")
+
+        values = range(0, count * size, size)
+        return ([int.from_bytes(data[i : i + size], self.order) for i in values], None)
+
+    def ifds(self):
+        """Yields (number, offset, entries, error) of IFD chain"""
+        offs, err = self.header()
+        if err:
+            yield (0, 0, {}, err)
+            return
 
         idx = 0
-        w = h = None
-        data = data[2:6]
-        offs = int.from_bytes(data, order)
         while offs:
-            if offs & 3:
-                return (None, f"Invalid IFD#{idx} offset {b2x(data)} ({offs})")
-
-            data = self.stream.pread(offs, 2)
-            if len(data) < 2:
-                return (None, "EOF")
-
-            offs += 2
-            nr = int.from_bytes(data, order)
-            while nr > 0:
-                data = self.stream.pread(offs, 12)
-                if len(data) < 12:
-                    return (None, "EOF")
-
-                tag = int.from_bytes(data[:2], order)
-
-                if tag == ImageLength:
-                    h, err = getint(data, order)
-                    if err:
-                        return (None, err)
-                    if w is not None:
-                        return (ImageSize(w, h), None)
-
-                if tag == ImageWidth:
-                    w, err = getint(data, order)
-                    if err:
-                        return (None, err)
-                    if h is not None:
-                        return (ImageSize(w, h), None)
-
-                nr -= 1
-                offs += 12
-
-            data = self.stream.pread(offs, 4)
-            if len(data) < 4:
-                return (None, "EOF")
+            if offs & 1:  # word aligned
+                data = offs.to_bytes(4, self.order)
+                yield (idx, offs, {}, f"Invalid IFD#{idx} offset {b2x(data)} ({offs})")
+                return
 
-            idx += 1
-            offs = int.from_bytes(data, order)
+            entries, next_offs, err = self.read_ifd(offs)
+            yield (idx, offs, entries, err)
+            if err:
+                return
 
-        return (None, "Not found")
+            idx += 1
+            offs = next_offs
 
     def image_size(self) -> ImageSizeResult:
-        order = self.stream.pread(0, 2)
-        if len(order) < 2:
-            return (None, "EOF")
-
-        if order == b"II":
-            return self.image_size_endian("little")
-        if order == b"MM":
-            return self.image_size_endian("big")
+        w = h = None
+        for _, _, entries, err in self.ifds():
+            if ImageWidth in entries:
+                w, werr = getint(entries[ImageWidth], self.order)
+                if werr:
+                    return (None, werr)
+            if ImageLength in entries:
+                h, herr = getint(entries[ImageLength], self.order)
+                if herr:
+                    return (None, herr)
+            if w is not None and h is not None:
+                return (ImageSize(w, h), None)
+            if err:
+                return (None, err)
 
-        return (None, f"Invalid byte order {b2x(order)}")
+        return (None, "Not found")
 
 
 def tiff_image_size(stream: IO[bytes]) -> ImageSizeResult:
@@ -1,5 +1,5 @@
+import os
 from binascii import hexlify
-from dataclasses import dataclass
 from typing import IO, Tuple
 
 
@@ -15,10 +15,67 @@ def le16(data: bytes):
     return int.from_bytes(data[:2], "little")
 
 
-@dataclass
 class ImageSize:
-    width: int
-    height: int
+    # plain class rather than dataclass, which is slow to import
+    __slots__ = ("width", "height")
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+
+    def fields(self) -> tuple:
+        return tuple(
+            (k, getattr(self, k))
+            for c in reversed(type(self).__mro__)
+            for k in getattr(c, "__slots__", ())
+        )
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={v!r}" for k, v in self.fields())
+        return f"{type(self).__name__}({fields})"
+
+    def __eq__(self, other) -> bool:
+        return type(other) is type(self) and self.fields() == other.fields()
+
+    __hash__ = None
+
+
+class TextureSize(ImageSize):
+    __slots__ = ("depth", "mips", "layers", "faces")
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        depth: int = 1,
+        mips: int = 1,
+        layers: int = 1,
+        faces: int = 1,
+    ):
+        super().__init__(width, height)
+        self.depth = depth
+        self.mips = mips
+        self.layers = layers
+        self.faces = faces
+
+
+class VideoSize(ImageSize):
+    __slots__ = ("duration", "codec", "rotation", "matrix")
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        duration: float = 0.0,
+        codec: str = None,
+        rotation: int = 0,
+        matrix: tuple = None,
+    ):
+        super().__init__(width, height)
+        self.duration = duration  # seconds
+        self.codec = codec  # sample entry fourcc, e.g. "avc1"
+        self.rotation = rotation  # degrees clockwise, width/height are rotated
+        self.matrix = matrix  # tkhd transformation matrix (a, b, u, c, d, v, x, y, w)
 
 
 ImageSizeResult = Tuple[ImageSize, str]
@@ -29,6 +86,147 @@ class ImageParser:
         pass
 
 
+class FdStream:
+    """File-like object reading file descriptor with os.pread()
+
+    Has no shared file position, so any number of FdStream objects
+    may read the same descriptor from different threads."""
+
+    def __init__(self, fd: int):
+        self.fd = fd
+        self.pos = 0
+
+    def seek(self, offs: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offs += self.pos
+        elif whence == os.SEEK_END:
+            offs += os.fstat(self.fd).st_size
+        self.pos = max(offs, 0)
+        return self.pos
+
+    def tell(self) -> int:
+        return self.pos
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            size = max(os.fstat(self.fd).st_size - self.pos, 0)
+        data = os.pread(self.fd, size, self.pos)
+        self.pos += len(data)
+        return data
+
+
+class WindowStream:
+    """Read-only view of [offs, offs + size) range of underlying stream"""
+
+    def __init__(self, stream: IO[bytes], offs: int, size: int):
+        self.stream = stream
+        self.start = offs
+        self.size = size
+        self.pos = 0
+
+    def seek(self, offs: int, whence: int = 0) -> int:
+        if whence == 1:
+            offs += self.pos
+        elif whence == 2:
+            offs += self.size
+        self.pos = max(offs, 0)
+        return self.pos
+
+    def tell(self) -> int:
+        return self.pos
+
+    def read(self, size: int = -1) -> bytes:
+        left = self.size - self.pos
+        if size < 0 or size > left:
+            size = left
+        if size <= 0:
+            return b""
+        self.stream.seek(self.start + self.pos)
+        data = self.stream.read(size)
+        self.pos += len(data)
+        return data
+
+
+class StreamWindowError(ValueError):
+    pass
+
+
+class ForwardStream:
+    """Seekable view of forward-only stream, e.g. pipe, socket or stdin
+
+    Last `window` bytes are kept in memory, so backward seeks within the
+    window are served from it; forward seeks read and discard data.
+    Reading before the window raises StreamWindowError."""
+
+    CHUNK = 65536
+
+    def __init__(self, stream: IO[bytes], window: int = 1 << 20):
+        self.stream = stream
+        self.window = window
+        self.buf = bytearray()
+        self.start = 0  # stream offset of buf[0]
+        self.pos = 0
+        self.eof = False
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.buf)
+
+    def fill(self, size: int, trim: bool = True) -> int:
+        """Reads up to size bytes from stream into window"""
+        data = self.stream.read(size) if not self.eof else b""
+        if not data:
+            self.eof = True
+            return 0
+        self.buf += data
+        excess = len(self.buf) - self.window
+        if trim and excess > 0:
+            del self.buf[:excess]
+            self.start += excess
+        return len(data)
+
+    def seek(self, offs: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offs += self.pos
+        elif whence == os.SEEK_END:
+            while self.fill(self.CHUNK):
+                pass
+            offs += self.end
+        self.pos = max(offs, 0)
+        return self.pos
+
+    def tell(self) -> int:
+        return self.pos
+
+    def read(self, size: int = -1) -> bytes:
+        if self.pos < self.start:
+            raise StreamWindowError(
+                f"Offset {self.pos} is before stream window at {self.start}"
+                f" (window size {self.window})"
+            )
+
+        # forward skip: discard data before pos, keeping window filled
+        while self.end < self.pos and self.fill(min(self.pos - self.end, self.CHUNK)):
+            pass
+
+        need = self.pos + size - self.end if size >= 0 else self.CHUNK
+        while need > 0:
+            n = self.fill(min(need, self.CHUNK) if size >= 0 else self.CHUNK, False)
+            if not n:
+                break
+            if size >= 0:
+                need -= n
+
+        offs = self.pos - self.start
+        data = bytes(self.buf[offs : offs + size] if size >= 0 else self.buf[offs:])
+        self.pos += len(data)
+        excess = len(self.buf) - self.window
+        if excess > 0:
+            del self.buf[:excess]
+            self.start += excess
+        return data
+
+
 class PreadStream:
     def __init__(self, stream: IO[bytes]):
         stream.seek(0)